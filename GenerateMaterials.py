@@ -1,6 +1,6 @@
 ######################################################
 ##
-##  Generate materials from shop_materialpath v1.11
+##  Generate materials from shop_materialpath v1.6
 ##  Trond Hille 2023
 ##
 ##  FBX and external models often come in with material paths set, but recreating the materials is a manual process.
@@ -13,29 +13,41 @@
 ##  v1.1    added support and choice for different render engines/material types 
 ##                Added support for Karma MaterialX and ease to add more later
 ##  v1.11   Enabled the output material flag to be enabled by default on new MtlX subnets
+##  v1.2    Material names are read in one bulk call instead of per primitive
+##                Added CollectMaterialCounts for per material primitive counts
+##  v1.3    Batch build mode: one undo group, one grid layout pass and one setParms call on the material SOP
+##                Prints timings per build phase
+##  v1.4    Added clone build mode. The first material is built once and the rest are copied from it
+##  v1.5    Added sync mode for re-imported geometry. Only added/removed materials are touched
+##                and the existing material SOP is updated in place
+##  v1.6    MatType, CreateKarmaMtlx and LayoutGrid moved to materialUtils, shared with PRB_MaterialLister
 ##
 ##
 ##
 #####################################################
 
 
+import hashlib
 import hou
+import json
 import re
-from enum import Enum
-
-materials = [] 
+import time
+from collections import Counter
 
+from materialUtils import CreateKarmaMtlx, ExtendedEnum, LayoutGrid, MatType
 
-class ExtendedEnum(Enum):
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-    @classmethod
-    def list(cls):
-        return list(map(lambda c: c.name, cls))
+materials = [] 
+_syncKey = 'generatematerials'
 
 
-class MatType(ExtendedEnum):
-    Redshift = "redshift_vopnet"
-    KarmaMtlX = "karmamtlx_vopnet"
+class BuildMode(ExtendedEnum):
+    Clone = "clone"
+    Create = "create"
     
     
     
@@ -47,62 +59,40 @@ def showDialog(node):
     
     # Create the custom dialog with the dropdown menu
     result = hou.ui.selectFromList(dropdown_options, exclusive=True, title='Select Material Type', message='Select Material Type', clear_on_cancel=True)
+    if len(result) == 0:
+        return
+    matclass = getattr(MatType, dropdown_options[result[0]])
+    #print(matclass)
+    
+    mode_options = BuildMode.list()
+    result = hou.ui.selectFromList(mode_options, exclusive=True, default_choices=(0,), title='Select Build Mode', message='Clone copies the first material, Create builds every material from scratch', clear_on_cancel=True)
     if len(result) != 0:
-        matclass = getattr(MatType, dropdown_options[result[0]])
-        #print(matclass)
-        GenerateMaterialsFromGeo(node, matclass)
-
-        
-        
+        buildmode = getattr(BuildMode, mode_options[result[0]])
         
+        # Offer to sync if materials were generated from this node before
+        sync = False
+        matnet = node.parent().node('materials')
+        if matnet is not None and LoadSyncState(matnet, node):
+            choice = hou.ui.displayMessage('Materials were generated from this node before.', buttons=('Sync', 'Rebuild'), default_choice=0, close_choice=0)
+            sync = choice == 0
+        GenerateMaterialsFromGeo(node, matclass, buildmode=buildmode, sync=sync)
 
-def CreateKarmaMtlx(matnet, matname):
-    matvopnet = matnet.createNode('subnet', matname)
-    mtlx = matvopnet.createNode('mtlxstandard_surface', matname)
-    
-    # CLEANUP Default nodes
-    tempPath = matvopnet.path() + '/suboutput1'
-    defOutput = hou.node(tempPath)
-    tempPath = matvopnet.path() + '/subinput1'
-    defInput = hou.node(tempPath)
-    defOutput.destroy()
-    defInput.destroy()
-
-    surfaceoutput = matvopnet.createNode('subnetconnector', 'surface_output')
         
-    surfaceoutput.parm('connectorkind').set(1)
-    surfaceoutput.parm('parmname').set('surface')
-    surfaceoutput.parm('parmlabel').set('Surface')
-    surfaceoutput.parm('parmtype').set(24) #Set to surface type
-    surfaceoutput.parm('connectorkind').eval()
-    surfaceoutput.setInput(0, mtlx)
-    
-    pos = mtlx.position()
-    pos += hou.Vector2((4,0))
-    surfaceoutput.setPosition(pos)
-    pos += hou.Vector2((0,-4))
-    
-    displacementoutput = matvopnet.createNode('subnetconnector', 'displacement')
-    displacementoutput.parm('connectorkind').set(1)
-    displacementoutput.parm('parmname').set('displacement')
-    displacementoutput.parm('parmlabel').set('Displacement')
-    displacementoutput.parm('parmtype').set(25) #Set to displacement type
-    displacementoutput.parm('connectorkind').eval()
-    displacementoutput.setPosition(pos)
         
-    matvopnet.setMaterialFlag(1)
-    
-    return matvopnet
-    
+        
 
-def CreateMaterial(matnet, matname, mattype=MatType.Redshift, skipexisting='True'):
+def CreateMaterial(matnet, matname, mattype=MatType.Redshift, skipexisting='True', existing=None):
     #Creates a new material at the given matnet. Defaults to Redshift Material Builder type.
+    #existing: optional dict of name -> node already in the matnet, saves a node lookup per material
     
     if skipexisting:
-        matpath = matnet.path() + '/' + matname
-        if hou.node(matpath) is not None:
+        if existing is not None:
+            oldmat = existing.get(matname)
+        else:
+            oldmat = matnet.node(matname)
+        if oldmat is not None:
             print(matname + ' already exists. Skipping Creation..')
-            return hou.node(matpath)
+            return oldmat
     newmat = None
     if mattype is MatType.KarmaMtlX:
         newmat = CreateKarmaMtlx(matnet, matname)
@@ -111,6 +101,35 @@ def CreateMaterial(matnet, matname, mattype=MatType.Redshift, skipexisting='True
         
     return newmat
 
+def CloneMaterials(proto, matnames):
+    #Copies the prototype material once per name and renames the copies.
+    #Copies are made in doubling batches, so 1000 materials only take ~10 copy calls
+    matnet = proto.parent()
+    protoname = proto.name()
+    clones = []
+    sources = [proto]
+    while len(clones) < len(matnames):
+        sources = sources[:len(matnames) - len(clones)]
+        copies = list(hou.copyNodesTo(sources, matnet))
+        clones.extend(copies)
+        sources = sources + copies
+    
+    # Move auto named copies out of the way if they took a name we are about to use
+    targets = set(matnames)
+    for clone in clones:
+        if clone.name() in targets:
+            clone.setName(clone.name() + '_tmp', unique_name=True)
+    
+    # Karma subnets name the surface shader after the material, other types have nothing to rename inside
+    renameinner = proto.node(protoname) is not None
+    for clone, matname in zip(clones, matnames):
+        clone.setName(matname, unique_name=True)
+        if renameinner:
+            clone.node(protoname).setName(matname, unique_name=True)
+    
+    return clones
+
+
 def remove_illegal_characters(string):
     # Define the pattern of illegal characters using regular expressions
     pattern = r'[#^!@()*&%$]'
@@ -120,45 +139,228 @@ def remove_illegal_characters(string):
     
     return cleaned_string
 
+
+def PrintTimings(timings):
+    print('Timings:')
+    for phase, seconds in timings:
+        print('    {0:<12} {1:.3f}s'.format(phase, seconds))
+
     
 def CollectMaterialNames(node):
-    #Loops through all primitives and collects all unquie materials.
-    matlib = []
+    #Collects all unique materials in the order they are first found.
+    #Reads the whole attribute in one call, looping over hou.Prim objects is far too slow on big FBX imports
+    geo = node.geometry()
+    if geo.findPrimAttrib('shop_materialpath') is None:
+        return []
+    
+    values = geo.primStringAttribValues('shop_materialpath')
+    # dict keeps insertion order, so this is a hash set that remembers the first seen order
+    return list(dict.fromkeys(values))
+
+
+def CollectMaterialCounts(node):
+    #Returns a dict of material -> number of primitives using it, in the order they are first found.
+    #Uses numpy when available, falls back to a Counter.
     geo = node.geometry()
-    for prim in geo.prims():
-        matname = prim.attribValue('shop_materialpath')
-        if matname not in matlib:
-            matlib.append(matname)
-    return matlib
+    if geo.findPrimAttrib('shop_materialpath') is None:
+        return {}
+    
+    values = geo.primStringAttribValues('shop_materialpath')
+    if np is None:
+        counts = Counter(values)
+        return {matname: counts[matname] for matname in dict.fromkeys(values)}
+    
+    # Number the names in first seen order and count the numbers. np.unique on an object array
+    # sorts python strings and is several times slower than this
+    index = {matname: i for i, matname in enumerate(dict.fromkeys(values))}
+    codes = np.fromiter(map(index.__getitem__, values), dtype=np.int32, count=len(values))
+    counts = np.bincount(codes, minlength=len(index))
+    return dict(zip(index, counts.tolist()))
         
 
 
-def GenerateMaterialsFromGeo(node, mattype=MatType.Redshift):
+def LoadSyncState(matnet, node):
+    # Sync state is stored as json user data on the matnet, one entry per source SOP
+    data = matnet.userData(_syncKey)
+    if not data:
+        return {}
+    try:
+        return json.loads(data).get(node.name(), {})
+    except ValueError:
+        return {}
+
+
+def SaveSyncState(matnet, node, state):
+    data = matnet.userData(_syncKey)
+    try:
+        allstates = json.loads(data) if data else {}
+    except ValueError:
+        allstates = {}
+    allstates[node.name()] = state
+    matnet.setUserData(_syncKey, json.dumps(allstates))
+
+
+def MaterialFingerprint(materials):
+    return hashlib.sha1('\n'.join(sorted(materials)).encode('utf-8')).hexdigest()
+
+
+def SyncSlots(oldslots, materials):
+    # Keeps surviving materials in their old material SOP slot so only changed slots need rewriting
+    # New materials fill the holes left by removed ones first, then get appended
+    current = set(materials)
+    oldset = set(oldslots)
+    added = [m for m in materials if m not in oldset]
+    slots = [m if m in current else None for m in oldslots]
+    for i, m in enumerate(slots):
+        if m is None and added:
+            slots[i] = added.pop(0)
+    slots.extend(added)
+    # Close remaining holes by moving entries from the end
+    while None in slots:
+        last = slots.pop()
+        if last is not None:
+            slots[slots.index(None)] = last
+    return slots
+
+
+def RetireMaterial(mat, source):
+    # Removed materials are kept (they may be edited or used elsewhere) but greyed out and commented
+    # The old colour is kept in user data for when the material comes back
+    mat.setUserData(_syncKey + '_color', json.dumps(mat.color().rgb()))
+    mat.setColor(hou.Color((0.3, 0.3, 0.3)))
+    mat.setComment('Retired: no longer used by ' + source.path())
+    mat.setGenericFlag(hou.nodeFlag.DisplayComment, True)
+
+
+def RestoreMaterial(mat):
+    # Undoes RetireMaterial
+    color = mat.userData(_syncKey + '_color')
+    if color:
+        mat.setColor(hou.Color(json.loads(color)))
+        mat.destroyUserData(_syncKey + '_color')
+    mat.setComment('')
+    mat.setGenericFlag(hou.nodeFlag.DisplayComment, False)
+
+
+def GenerateMaterialsFromGeo(node, mattype=MatType.Redshift, batch=True, buildmode=BuildMode.Clone, sync=False):
     # Main script execution
+    # batch: build everything inside one undo group, lay out the new materials once at the end
+    # and set all material SOP parms with a single setParms call
+    
+    # buildmode: Clone builds the first material once and copies it for the rest, works for any MatType
+    
+    # sync: diff against the last run stored on the matnet, only create/retire the changed materials
+    # and update the existing material SOP in place. Does nothing if the material set is unchanged
+    
+    if batch:
+        with hou.undos.group('Generate Materials'):
+            BuildMaterials(node, mattype, batch, buildmode, sync)
+    else:
+        BuildMaterials(node, mattype, batch, buildmode, sync)
+
+
+def BuildMaterials(node, mattype=MatType.Redshift, batch=True, buildmode=BuildMode.Clone, sync=False):
+    timings = []
+    start = time.time()
     
     root = node.parent()
     materials = CollectMaterialNames(node)
+    timings.append(('collect', time.time() - start))
     
     print('Found ' + str(len(materials)) + ' unique materials..')
     if len(materials) < 1:
         return
 
     # Create Matnet
-    matpath = root.path() + '/materials'
-    matnet = hou.node(matpath)
+    start = time.time()
+    matnet = root.node('materials')
     if matnet == None:
         matnet = root.createNode('matnet', 'materials')
     
+    # Compare with last run
+    state = {}
+    matsop = None
+    fingerprint = MaterialFingerprint(materials)
+    if sync:
+        state = LoadSyncState(matnet, node)
+        if state.get('matsop'):
+            matsop = root.node(state['matsop'])
+        if matsop is not None and state.get('fingerprint') == fingerprint:
+            # Same materials on the geometry, but some may have been deleted by hand since
+            names = set(n.name() for n in matnet.children())
+            if all(name in names for name in state.get('materials', {}).values()):
+                print('Materials are up to date..')
+                return
+    
+    clone = buildmode is BuildMode.Clone
+    existing = None
+    if batch or clone or sync:
+        existing = {n.name(): n for n in matnet.children()}
+    
+    # Materials deleted by hand since the last run get rebuilt
+    assigned = {}
+    if matsop is not None:
+        assigned = {mat: name for mat, name in state.get('materials', {}).items() if name in existing}
+    current = set(materials)
+    tobuild = [mat for mat in materials if mat not in assigned]
+    removed = [mat for mat in assigned if mat not in current]
+    
     newmats = []
-    for mat in materials:
+    created = []
+    proto = None
+    toclone = []
+    for mat in tobuild:
         matname = mat.rsplit('/', 1)[-1]
         matname = remove_illegal_characters(matname)
         
-        newmat = CreateMaterial(matnet, matname, mattype)
-            
-        newmat.moveToGoodPosition()
+        if proto is not None and (matname not in existing or existing[matname] is None):
+            # Filled in below once all clones are made
+            if matname not in existing:
+                toclone.append(matname)
+                existing[matname] = None
+            newmats.append(matname)
+            continue
+        
+        newmat = CreateMaterial(matnet, matname, mattype, existing=existing)
+        
+        if existing is None:
+            newmat.moveToGoodPosition()
+        elif matname not in existing:
+            existing[matname] = newmat
+            created.append(newmat)
+            if not batch:
+                newmat.moveToGoodPosition()
+            if clone:
+                proto = newmat
         newmats.append(newmat)
-     
+    
+    if toclone:
+        clones = CloneMaterials(proto, toclone)
+        for matname, newmat in zip(toclone, clones):
+            existing[matname] = newmat
+            if not batch:
+                newmat.moveToGoodPosition()
+        newmats = [existing[m] if isinstance(m, str) else m for m in newmats]
+        created.extend(clones)
+    
+    for mat, newmat in zip(tobuild, newmats):
+        assigned[mat] = newmat.name()
+        # Material came back after being retired
+        if sync and newmat.comment().startswith('Retired:'):
+            RestoreMaterial(newmat)
+    
+    # Several shop paths can share a node (/a/mat and /b/mat), only retire nodes nothing uses anymore
+    unused = set(assigned.pop(mat) for mat in removed) - set(assigned.values())
+    for name in sorted(unused):
+        oldmat = existing.get(name)
+        if oldmat is not None:
+            RetireMaterial(oldmat, node)
+    timings.append(('create', time.time() - start))
+    
+    start = time.time()
+    if batch:
+        LayoutGrid(created)
+    timings.append(('layout', time.time() - start))
     
     # Create Materials SOP
     '''
@@ -169,28 +371,52 @@ def GenerateMaterialsFromGeo(node, mattype=MatType.Redshift):
         matsop = root.createNode('material', 'update_material_assignments')
         matsop.setInput(0, node)
     '''
-    matsop = root.createNode('material', 'update_material_assignments')
-    matsop.setInput(0, node)
-        
-    pos = node.position()
-    pos[1] -= 2
-    matsop.setPosition(pos)
-    matsop.moveToGoodPosition()
+    start = time.time()
+    oldslots = []
+    if matsop is not None:
+        oldslots = state.get('slots', [])
+        slots = SyncSlots(oldslots, materials)
+    else:
+        slots = materials
+        matsop = root.createNode('material', 'update_material_assignments')
+        matsop.setInput(0, node)
+            
+        pos = node.position()
+        pos[1] -= 2
+        matsop.setPosition(pos)
+        matsop.moveToGoodPosition()
     
     # Update material SOP
-    nummats = len(newmats)
+    nummats = len(slots)
     matsop.parm('num_materials').set(nummats)
     matsop.parm('num_materials').eval()
     
+    parms = {}
     for i in range(nummats):
+        # Unchanged slots of a synced material SOP are left alone
+        if i < len(oldslots) and oldslots[i] == slots[i]:
+            continue
         group = 'group' + str(i+1)
         path = 'shop_materialpath' + str(i+1)
         
-        groupstring = '@shop_materialpath="' + materials[i] + '"'
-        matstring = '../' + matnet.name() + '/' + newmats[i].name()
-
-        matsop.parm(group).set(groupstring)
-        matsop.parm(path).set(matstring)
+        parms[group] = '@shop_materialpath="' + slots[i] + '"'
+        parms[path] = '../' + matnet.name() + '/' + assigned[slots[i]]
+    
+    if batch:
+        matsop.setParms(parms)
+    else:
+        for name, value in parms.items():
+            matsop.parm(name).set(value)
+    timings.append(('assign', time.time() - start))
+    
+    SaveSyncState(matnet, node, {
+        'fingerprint': fingerprint,
+        'materials': assigned,
+        'slots': slots,
+        'matsop': matsop.name(),
+    })
+    
+    PrintTimings(timings)
     
       
     
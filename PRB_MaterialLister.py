@@ -1,27 +1,30 @@
+import ctypes
+import ctypes.util
 import os
 import re
+import select
+import sqlite3
+import struct
+import sys
+import threading
+import time
 import hou
-from collections import defaultdict
+from collections import defaultdict, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pprint import pprint
 
-def longest_common_prefix(strings):
-    """Find the longest common prefix string amongst an array of strings."""
-    if not strings:
-        return ""
-    
-    # Start by assuming the whole of the first string is the common prefix
-    prefix = strings[0]
-
-    # Compare the assumed prefix with each string in the list
-    for string in strings:
-        # Reduce the prefix in length until it matches the start of each string
-        while not string.startswith(prefix):
-            prefix = prefix[:-1]
-            if prefix == "":
-                return ""
-    
-    return prefix
+from materialUtils import CreateKarmaMtlx, LayoutGrid, MatType, SetupKarmaMtlx
+from texture_parser import UdimSet, longest_common_prefix, missing_tiles, parse_texture_name, parse_texture_names, set_names
 
+# Threads used to list folders. Mostly waiting on the network share, so more than the core count is fine
+SCAN_WORKERS = 16
+# Persistent texture index, shared by all sessions of this user
+_indexFile = os.path.join(os.path.expanduser("~"), '.tronotools', 'texture_index.sqlite')
+# Bump when the parser changes, so folders are parsed again
+_indexVersion = 4
+# Watch mode: quiet time before a burst of writes is reported, and the poll interval without inotify
+WATCH_DEBOUNCE = 0.5
+WATCH_POLL_INTERVAL = 2.0
 
 
 def list_textures():    
@@ -68,52 +71,727 @@ def list_textures():
     return organized_textures
     
 
-def list_texture_sets():
+def _set_key(rel_path, set_name):
+    # Sets are per folder. Outside the root the folder is part of the name, so rock/body and wood/body stay apart
+    return f"{rel_path}/{set_name}" if rel_path else set_name
+
+
+class TextureScanResult:
+    """Result of scan_texture_folder."""
+
+    def __init__(self, root):
+        self.root = root
+        # set key (see _set_key) -> texture type -> set of file names (relative to root, UDIMs as <UDIM>)
+        self.texture_sets = defaultdict(lambda: defaultdict(set))
+        # set key -> texture type -> UdimSet of existing tiles and their bytes
+        self.udims = defaultdict(lambda: defaultdict(UdimSet))
+        self.prefixes = {}      # relative folder -> common prefix used to parse it
+        self.directories = 0
+        self.files = 0
+        self.matched = 0
+        self.errors = []        # (folder, error message)
+        self.seconds = 0.0
+
+    def organized(self):
+        """Texture sets as plain dicts of lists, the format list_texture_sets returns."""
+        organized_textures = defaultdict(dict)
+        for set_name, types in self.texture_sets.items():
+            for type_name, files in types.items():
+                organized_textures[set_name][type_name] = sorted(files)
+        return organized_textures
+
+    def missing_tiles(self, set_name):
+        """{texture type: [tiles]} that other maps of the set have but this one lacks."""
+        return missing_tiles(self.udims.get(set_name, {}))
+
+    def set_bytes(self, set_name):
+        """Total size of all textures in a set."""
+        return sum(udims.bytes for udims in self.udims.get(set_name, {}).values())
+
+    def __str__(self):
+        return (f"{self.matched} textures in {len(self.texture_sets)} sets from {self.files} files "
+                f"in {self.directories} folders ({self.seconds:.2f}s, {len(self.errors)} errors)")
+
+
+def _scan_directory(folder_path, rel_path):
+    """List one folder with a single os.scandir call and parse its texture files.
+
+    Returns (rel_path, common prefix, file count, matches, subfolders). Runs on a worker thread.
+    Matches are the parse_texture_names tuples with the file size added.
+    """
+    files = {}
+    subdirs = []
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.name)
+            else:
+                files[entry.name] = entry
+
+    common_prefix, matches = parse_texture_names(list(files))
+    # Only textures need a size. Free on Windows, one stat each elsewhere
+    matches = [match + (files[match[0]].stat().st_size,) for match in matches]
+
+    subfolders = [(os.path.join(folder_path, name), f"{rel_path}/{name}" if rel_path else name) for name in subdirs]
+    return rel_path, common_prefix, len(files), matches, subfolders
+
+
+def scan_texture_folder(folder_path, recursive=True, workers=SCAN_WORKERS):
+    """Scan a folder, and by default all its subfolders, for texture sets.
+
+    Every folder is read once with os.scandir. Subfolders are spread over a thread pool to hide
+    network share latency and the texture sets are filled in as each folder finishes.
+    """
+    start = time.time()
+    result = TextureScanResult(folder_path)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(_scan_directory, folder_path, "")}
+        folders = {next(iter(pending)): folder_path}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    rel_path, common_prefix, file_count, matches, subfolders = future.result()
+                except OSError as e:
+                    result.errors.append((folders.pop(future), str(e)))
+                    continue
+                folders.pop(future)
+                result.directories += 1
+                result.files += file_count
+                result.matched += len(matches)
+                result.prefixes[rel_path] = common_prefix
+                for file_name, texture_name, texture_type, color_space, udim, ext, normalized_name, size in matches:
+                    if rel_path:
+                        normalized_name = f"{rel_path}/{normalized_name}"
+                    set_key = _set_key(rel_path, texture_name)
+                    result.texture_sets[set_key][texture_type].add(normalized_name)  # Using set to add unique items
+                    result.udims[set_key][texture_type].add(udim, size)
+                if recursive:
+                    for sub_path, sub_rel in subfolders:
+                        sub_future = pool.submit(_scan_directory, sub_path, sub_rel)
+                        folders[sub_future] = sub_path
+                        pending.add(sub_future)
+
+    result.seconds = time.time() - start
+    return result
+
+
+class TextureIndex:
+    """On disk index of parsed texture files, stored in SQLite.
+
+    Folders are only re-read when their mtime changed. Unchanged folders cost one stat, their
+    subfolder names are stored with them, so subfolders that were never indexed are still found. Set and texture type lookups are indexed queries.
+    """
+
+    def __init__(self, path=_indexFile):
+        folder = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        self.path = path
+        self.db = sqlite3.connect(path)
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != _indexVersion:
+            self.db.executescript("DROP TABLE IF EXISTS directories; DROP TABLE IF EXISTS textures;")
+            self.db.execute(f"PRAGMA user_version = {_indexVersion}")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS directories (
+                path TEXT PRIMARY KEY, parent TEXT, mtime REAL, prefix TEXT, subdirs TEXT);
+            CREATE TABLE IF NOT EXISTS textures (
+                dir TEXT, file TEXT, set_name TEXT, texture_type TEXT, color_space TEXT,
+                udim INTEGER, ext TEXT, normalized TEXT, size INTEGER, PRIMARY KEY (dir, file));
+            CREATE INDEX IF NOT EXISTS directories_parent ON directories (parent);
+            CREATE INDEX IF NOT EXISTS textures_set ON textures (set_name, texture_type);
+            CREATE INDEX IF NOT EXISTS textures_type ON textures (texture_type);
+        """)
+
+    def close(self):
+        self.db.close()
+
+    @staticmethod
+    def _norm(path):
+        return os.path.normpath(path).replace('\\', '/')
+
+    @staticmethod
+    def _below(root):
+        # LIKE pattern for everything below root. _ and % are wildcards in LIKE, escape them
+        escaped = root.rstrip('/').replace('!', '!!').replace('%', '!%').replace('_', '!_')
+        return escaped + '/%'
+
+    def _subtree(self, root):
+        # Indexed folders below (and including) root: path -> (mtime, subfolder names)
+        rows = self.db.execute("SELECT path, mtime, subdirs FROM directories WHERE path = ? OR path LIKE ? ESCAPE '!'",
+                               (root, self._below(root)))
+        # Names can't contain '/', so they are stored '/' separated
+        return {path: (mtime, subdirs.split('/') if subdirs else []) for path, mtime, subdirs in rows}
+
+    def _drop(self, paths):
+        self.db.executemany("DELETE FROM textures WHERE dir = ?", ((p,) for p in paths))
+        self.db.executemany("DELETE FROM directories WHERE path = ?", ((p,) for p in paths))
+
+    def refresh(self, root, recursive=True, workers=SCAN_WORKERS):
+        """Bring the index of root up to date. Returns the number of folders that were re-read."""
+        root = self._norm(root)
+        known = self._subtree(root)
+
+        def check(path, rel_path):
+            # Unchanged: (path, mtime, None). Changed: (path, mtime, _scan_directory result)
+            mtime = os.stat(path).st_mtime
+            cached = known.get(path)
+            if cached is not None and cached[0] == mtime:
+                return path, mtime, None
+            return path, mtime, _scan_directory(path, rel_path)
+
+        seen = set()
+        rescanned = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = {pool.submit(check, root, "")}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        path, mtime, scan = future.result()
+                    except OSError:
+                        continue
+                    seen.add(path)
+                    if scan is None:
+                        # Subfolders missing from the index (first indexed without recursion) get read by check
+                        subfolders = [(self._norm(os.path.join(path, name)), None) for name in known[path][1]]
+                    else:
+                        rescanned += 1
+                        rel_path, common_prefix, file_count, matches, subfolders = scan
+                        subfolders = [(self._norm(sub_path), sub_rel) for sub_path, sub_rel in subfolders]
+                        parent = self._norm(os.path.dirname(path))
+                        self.db.execute("DELETE FROM textures WHERE dir = ?", (path,))
+                        subdirs = '/'.join(os.path.basename(sub_path) for sub_path, sub_rel in subfolders)
+                        self.db.execute("INSERT OR REPLACE INTO directories VALUES (?, ?, ?, ?, ?)",
+                                        (path, parent, mtime, common_prefix, subdirs))
+                        self.db.executemany("INSERT OR REPLACE INTO textures VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                            ((path,) + tuple(match) for match in matches))
+                    if recursive:
+                        for sub_path, sub_rel in subfolders:
+                            pending.add(pool.submit(check, sub_path, sub_rel))
+
+        if recursive:
+            # Folders that were deleted since the last refresh
+            self._drop([path for path in known if path not in seen])
+        self.db.commit()
+        return rescanned
+
+    @staticmethod
+    def _rel(root, dir):
+        # dir relative to root, "" for root itself
+        return dir[len(root):].strip('/') if dir != root else ""
+
+    def textures(self, root, set_name=None, texture_type=None):
+        """Indexed rows below root as (dir, file, set, type, colour space, udim, ext, normalized, size).
+
+        set_name is a set key as texture_sets returns it, relative to root.
+        """
+        root = self._norm(root)
+        if set_name is not None:
+            rel_path, _, name = set_name.rpartition('/')
+            query = "SELECT * FROM textures WHERE dir = ? AND set_name = ?"
+            args = [f"{root}/{rel_path}" if rel_path else root, name]
+        else:
+            query = "SELECT * FROM textures WHERE (dir = ? OR dir LIKE ? ESCAPE '!')"
+            args = [root, self._below(root)]
+        if texture_type is not None:
+            query += " AND texture_type = ?"
+            args.append(texture_type)
+        return self.db.execute(query, args).fetchall()
+
+    def udim_sets(self, root, set_name=None):
+        """{set key: {texture type: UdimSet}} built from the index, no folders are read."""
+        root = self._norm(root)
+        udims = defaultdict(lambda: defaultdict(UdimSet))
+        for row in self.textures(root, set_name):
+            udims[_set_key(self._rel(root, row[0]), row[2])][row[3]].add(row[5], row[8] or 0)
+        return udims
+
+    def texture_sets(self, root, set_name=None, texture_type=None):
+        """Same format as list_texture_sets, built from the index."""
+        root = self._norm(root)
+        texture_sets = defaultdict(lambda: defaultdict(set))
+        for dir, file_name, name, type_name, color_space, udim, ext, normalized, size in self.textures(root, set_name, texture_type):
+            rel_path = self._rel(root, dir)
+            if rel_path:
+                normalized = rel_path + '/' + normalized
+            texture_sets[_set_key(rel_path, name)][type_name].add(normalized)
+        organized_textures = defaultdict(dict)
+        for name, types in texture_sets.items():
+            for type_name, files in types.items():
+                organized_textures[name][type_name] = sorted(files)
+        return organized_textures
+
+
+def list_texture_sets(recursive=True, use_index=True, folder_path=None):
     # Let the user select a directory
-    folder_path = hou.ui.selectFile(title="Select Folder of Textures", collapse_sequences=False, file_type=hou.fileType.Directory)
+    if folder_path is None:
+        folder_path = hou.ui.selectFile(title="Select Folder of Textures", collapse_sequences=False, file_type=hou.fileType.Directory)
     if not folder_path:
         hou.ui.displayMessage("No folder selected.")
-        return []
-        
-    # Read all filenames and find the longest common prefix for base name
-    filenames = os.listdir(folder_path)
-    common_prefix = longest_common_prefix(filenames)
-    
-    print(f"Common prefix: {common_prefix}\n")
-    
-    # Dictionary to hold grouped textures
-    texture_sets = defaultdict(lambda: defaultdict(set))
+        return {}
 
-    # Regex to parse filenames and group them into sets
-    pattern = re.compile(r"^(?i)(" + re.escape(common_prefix) + r")(.*)_(BaseColor|Emissive|Height|Normal|Metallic|Roughness|Glossiness|Gloss|Opacity|Transmission)(.)?(ACES - ACEScg|raw|srgb|rgb)?(.\d{4})?(\.exr|\.png|\.tiff|\.tif|.jpg)*$")
-    
-    # Traverse the specified folder
-    for file_name in os.listdir(folder_path):
-        match = pattern.match(file_name)
-        if match:
-            base_name, texture_name, texture_type, spacer, color_space, udim, ext = match.groups()
-            normalized_name = f"{base_name}{texture_name}_{texture_type}{spacer}{color_space}"
-            if udim:
-                normalized_name += ".<UDIM>"
-            normalized_name += ext
-            texture_sets[texture_name][texture_type].add(normalized_name)  # Using set to add unique items
-
-    # Convert sets to lists for output
-    organized_textures = defaultdict(dict)
-    for set_name, types in texture_sets.items():
-        for type_name, files in types.items():
-            organized_textures[set_name][type_name] = list(files)
+    if use_index:
+        start = time.time()
+        index = TextureIndex()
+        rescanned = index.refresh(folder_path, recursive)
+        organized_textures = index.texture_sets(folder_path)
+        index.close()
+        print(f"{len(organized_textures)} texture sets, {rescanned} folders re-read ({time.time() - start:.3f}s)")
+        return organized_textures
 
-    return organized_textures
+    result = scan_texture_folder(folder_path, recursive)
+
+    print(f"Common prefix: {result.prefixes.get('', '')}\n")
+    print(result)
+
+    return result.organized()
     
 def get_textures_for_set(texture_sets, set_name):
     # Return all textures for a specific set
     return texture_sets.get(set_name, [])
 
+# Texture type -> (Redshift StandardMaterial input, MaterialX standard surface input, mtlximage signature)
+# Normal and Height are wired through a normal map / displacement node, see _wire_redshift and _wire_mtlx
+SHADER_INPUTS = {
+    'BaseColor': ('base_color', 'base_color', 'color3'),
+    'Roughness': ('refl_roughness', 'specular_roughness', 'float'),
+    'Metallic': ('metalness', 'metalness', 'float'),
+    'Specular': ('refl_weight', 'specular', 'float'),
+    'Opacity': ('opacity_color', 'opacity', 'color3'),
+    'Emissive': ('emission_color', 'emission_color', 'color3'),
+    'Transmission': ('refr_weight', 'transmission', 'float'),
+    'Normal': (None, 'normal', 'vector3'),
+    'Height': (None, None, 'float'),
+}
+# Everything else is data and must not be colour managed
+COLOR_TEXTURES = ('BaseColor', 'Emissive', 'Opacity')
+
+
+def _material_name(set_name):
+    name = re.sub(r'\W', '_', set_name).strip('_') or 'material'
+    return f"_{name}" if name[0].isdigit() else name
+
+
+def _texture_path(folder_path, file_name):
+    # <UDIM> is expanded by both Redshift and Karma
+    return f"{folder_path.rstrip('/')}/{file_name}"
+
+
+def _wire_redshift(vopnet, textures, folder_path):
+    # redshift_vopnet comes with an output and a StandardMaterial already connected
+    output = next((c for c in vopnet.children() if c.type().name() == 'redshift_material'), None)
+    if output is None:
+        output = vopnet.createNode('redshift_material')
+    surface = output.inputs()[0] if output.inputs() else None
+    if surface is None:
+        surface = vopnet.createNode('redshift::StandardMaterial')
+        output.setInput(0, surface)
+
+    for texture_type, file_name in textures.items():
+        sampler = vopnet.createNode('redshift::TextureSampler', f"{texture_type}_tex")
+        parms = {'tex0': _texture_path(folder_path, file_name)}
+        if texture_type not in COLOR_TEXTURES:
+            parms['tex0_colorSpace'] = 'Raw'
+        sampler.setParms(parms)
+        if texture_type == 'Normal':
+            bump = vopnet.createNode('redshift::BumpMap', 'normal_map')
+            bump.parm('inputType').set(1)   # Tangent space normal
+            bump.setInput(0, sampler)
+            surface.setNamedInput('bump_input', bump, 0)
+        elif texture_type == 'Height':
+            displacement = vopnet.createNode('redshift::Displacement', 'displacement')
+            displacement.setInput(0, sampler)
+            output.setNamedInput('Displacement', displacement, 0)
+        else:
+            surface.setNamedInput(SHADER_INPUTS[texture_type][0], sampler, 0)
+
+
+def _wire_mtlx(vopnet, textures, folder_path):
+    # vopnet is a CreateKarmaMtlx subnet, it is set up again if its standard surface is gone.
+    # Existing materials only get the new textures
+    surface = next((c for c in vopnet.children() if c.type().name() == 'mtlxstandard_surface'), None)
+    if surface is None:
+        surface = SetupKarmaMtlx(vopnet, vopnet.name())
+    displacement_output = vopnet.node('displacement')
+
+    for texture_type, file_name in textures.items():
+        signature = SHADER_INPUTS[texture_type][2]
+        image = vopnet.createNode('mtlximage', f"{texture_type}_tex")
+        image.setParms({'file': _texture_path(folder_path, file_name), 'signature': signature})
+        if texture_type == 'Normal':
+            normal_map = vopnet.createNode('mtlxnormalmap', 'normal_map')
+            normal_map.setInput(0, image)
+            surface.setNamedInput('normal', normal_map, 0)
+        elif texture_type == 'Height':
+            displacement = vopnet.createNode('mtlxdisplacement', 'displacement')
+            displacement.setInput(0, image)
+            if displacement_output is not None:
+                displacement_output.setInput(0, displacement)
+        else:
+            surface.setNamedInput(SHADER_INPUTS[texture_type][1], image, 0)
+
+
+def build_texture_materials(texture_sets, folder_path, matnet=None, mattype=MatType.Redshift):
+    """Create one material per texture set with its textures wired into the shader.
+
+    texture_sets is the list_texture_sets dict (set name -> texture type -> file names relative to
+    folder_path). Sets in subfolders are named folder/set, their materials folder_set. Everything
+    happens in one undo group and the new materials are laid out in one pass at the end. Materials
+    that already exist are skipped. Returns the new material nodes.
+    """
+    start = time.time()
+    if matnet is None:
+        matnet = hou.node('/mat')
+    existing = {n.name() for n in matnet.children()}
+    created = []
+    skipped = defaultdict(list)
+
+    with hou.undos.group('Build Texture Materials'):
+        for set_name, types in sorted(texture_sets.items()):
+            name = _material_name(set_name)
+            if name in existing:
+                print(f"{name} already exists. Skipping Creation..")
+                continue
+            # One file per type, the first (UDIM normalized) name
+            textures = {}
+            for type_name, files in types.items():
+                if type_name in SHADER_INPUTS:
+                    textures[type_name] = sorted(files)[0]
+                else:
+                    skipped[type_name].append(set_name)
+
+            if mattype is MatType.KarmaMtlX:
+                vopnet = CreateKarmaMtlx(matnet, name)
+                _wire_mtlx(vopnet, textures, folder_path)
+            else:
+                vopnet = matnet.createNode(mattype.value, name)
+                _wire_redshift(vopnet, textures, folder_path)
+            vopnet.layoutChildren()
+            existing.add(name)
+            created.append(vopnet)
+
+        # Grid layout below the nodes that were already there
+        LayoutGrid(created)
+
+    for type_name, sets in skipped.items():
+        print(f"No shader input for {type_name}, not connected in {len(sets)} sets")
+    print(f"Created {len(created)} {mattype.name} materials in {matnet.path()} ({time.time() - start:.3f}s)")
+    return created
+
+
+def build_materials_dialog(texture_sets, folder_path):
+    # Ask for the material type, then build all texture sets into /mat
+    if not texture_sets:
+        return []
+    options = MatType.list()
+    result = hou.ui.selectFromList(options, exclusive=True, title='Select Material Type',
+                                   message=f"Build materials for {len(texture_sets)} texture sets", clear_on_cancel=True)
+    if len(result) == 0:
+        return []
+    return build_texture_materials(texture_sets, folder_path, mattype=getattr(MatType, options[result[0]]))
+
+
+TextureEvent = namedtuple('TextureEvent', 'kind set_name texture_type file_name')
+
+# inotify flags, see inotify(7)
+_IN_CLOSE_WRITE = 0x8
+_IN_MOVED_FROM = 0x40
+_IN_MOVED_TO = 0x80
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_DELETE_SELF = 0x400
+_IN_MOVE_SELF = 0x800
+_IN_Q_OVERFLOW = 0x4000
+_IN_IGNORED = 0x8000
+_IN_ISDIR = 0x40000000
+_IN_WATCH_MASK = (_IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE |
+                  _IN_DELETE_SELF | _IN_MOVE_SELF)
+_IN_EVENT = struct.Struct('iIII')
+
+
+class _Inotify:
+    """Minimal inotify wrapper on top of libc, no extra packages needed."""
+
+    def __init__(self):
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.paths = {}     # watch descriptor -> folder
+
+    def add(self, path):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), _IN_WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_add_watch failed', path)
+        self.paths[wd] = path
+
+    def read(self, timeout):
+        """Events as (folder, mask, name) tuples, waits at most timeout seconds for the first one."""
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = _IN_EVENT.unpack_from(data, offset)
+            offset += _IN_EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            path = self.paths.pop(wd, None) if mask & _IN_IGNORED else self.paths.get(wd)
+            events.append((path, mask, name))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class TextureWatcher:
+    """Watch a texture folder and report texture set changes as TextureEvents.
+
+    Uses inotify on Linux and falls back to polling elsewhere (or on network shares where inotify
+    is not available). Bursts of writes are debounced: inotify waits for WATCH_DEBOUNCE seconds of
+    quiet, polling waits until a folder looks the same on two polls in a row.
+
+    Only changed folders are listed again and only file names that were not seen before are parsed.
+    Set names depend on the prefix shared by the whole folder, so set_names runs on the folder's
+    already parsed names. callback gets a list of TextureEvents with kind added, removed or modified,
+    one per normalized (UDIM) texture. It runs on the watcher thread.
+    """
+
+    def __init__(self, folder_path, callback, recursive=True, debounce=WATCH_DEBOUNCE,
+                 poll_interval=WATCH_POLL_INTERVAL, use_inotify=True):
+        self.root = os.path.normpath(folder_path)
+        self.callback = callback
+        self.recursive = recursive
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify and sys.platform.startswith('linux')
+        self.backend = None
+        self.folders = {}   # folder -> (parsed {file name: TextureName or None}, textures {normalized: (set, type, stats)})
+        self._inotify = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _rel_folder(self, folder):
+        rel = os.path.relpath(folder, self.root).replace('\\', '/')
+        return "" if rel == '.' else rel
+
+    def _rel(self, folder, file_name):
+        rel = self._rel_folder(folder)
+        return f"{rel}/{file_name}" if rel else file_name
+
+    def _scan(self, folder):
+        """List one folder again. Returns (textures, subfolders), textures is empty if it is gone."""
+        old_parsed = self.folders.get(folder, ({}, {}))[0]
+        parsed = {}
+        stats = {}
+        subfolders = []
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subfolders.append(entry.path)
+                        continue
+                    name = entry.name
+                    texture = old_parsed[name] if name in old_parsed else parse_texture_name(name)
+                    parsed[name] = texture
+                    if texture is not None:
+                        st = entry.stat()
+                        stats[name] = (st.st_size, st.st_mtime)
+        except (FileNotFoundError, NotADirectoryError):
+            return None, [], []
+
+        textures = defaultdict(set)
+        kinds = {}
+        prefix, sets = set_names([t.name for t in parsed.values() if t is not None])
+        rel_path = self._rel_folder(folder)
+        for name, texture in parsed.items():
+            if texture is None:
+                continue
+            normalized = self._rel(folder, texture.normalized)
+            kinds[normalized] = (_set_key(rel_path, sets[texture.name]), texture.map_type)
+            textures[normalized].add((name,) + stats[name])
+        textures = {n: kinds[n] + (frozenset(files),) for n, files in textures.items()}
+        return parsed, textures, subfolders
+
+    def _diff(self, old, new):
+        events = []
+        for normalized, (set_name, texture_type, files) in new.items():
+            previous = old.get(normalized)
+            if previous is None:
+                events.append(TextureEvent('added', set_name, texture_type, normalized))
+            elif previous != (set_name, texture_type, files):
+                events.append(TextureEvent('modified', set_name, texture_type, normalized))
+        for normalized, (set_name, texture_type, files) in old.items():
+            if normalized not in new:
+                events.append(TextureEvent('removed', set_name, texture_type, normalized))
+        return events
+
+    def _update(self, folders, pending=None):
+        """Rescan folders and return their events. With pending, folders whose contents changed since
+        the last look are held back (still being written) and returned as the new pending dict."""
+        events = []
+        settling = {}
+        queue = list(folders)
+        while queue:
+            folder = queue.pop()
+            parsed, textures, subfolders = self._scan(folder)
+            if parsed is None:
+                # Folder is gone, so is everything below it
+                for path in [p for p in self.folders if p == folder or p.startswith(folder + os.sep)]:
+                    events.extend(self._diff(self.folders.pop(path)[1], {}))
+                continue
+            if pending is not None and pending.get(folder) != textures:
+                old = self.folders.get(folder, ({}, {}))[1]
+                if textures != old:
+                    settling[folder] = textures
+                    continue
+            if folder not in self.folders and self._inotify is not None:
+                self._watch(folder)
+            events.extend(self._diff(self.folders.get(folder, ({}, {}))[1], textures))
+            self.folders[folder] = (parsed, textures)
+            if self.recursive:
+                queue.extend(sub for sub in subfolders if sub not in self.folders)
+        if pending is not None:
+            return events, settling
+        return events
+
+    def _watch(self, folder):
+        try:
+            self._inotify.add(folder)
+        except OSError:
+            pass
+
+    def _emit(self, events):
+        if events:
+            self.callback(events)
+
+    def start(self):
+        """Read the current state (no events for it) and start watching on a background thread."""
+        if self.use_inotify:
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError):
+                self._inotify = None
+        self.backend = 'inotify' if self._inotify is not None else 'poll'
+        self._update([self.root])
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='TextureWatcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _run(self):
+        if self._inotify is not None:
+            self._run_inotify()
+        else:
+            self._run_poll()
+
+    def _run_inotify(self):
+        dirty = set()
+        last_event = 0.0
+        while not self._stop.is_set():
+            timeout = self.debounce if dirty else 0.2
+            for folder, mask, name in self._inotify.read(timeout):
+                if mask & _IN_Q_OVERFLOW:
+                    # Kernel queue overflowed, events were lost
+                    dirty.update(self.folders)
+                elif folder is not None:
+                    dirty.add(folder)
+                    if mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO | _IN_MOVED_FROM | _IN_DELETE):
+                        dirty.add(os.path.join(folder, name))
+                last_event = time.time()
+            if dirty and time.time() - last_event >= self.debounce:
+                folders, dirty = dirty, set()
+                self._emit(self._update(folders))
+
+    def _run_poll(self):
+        pending = {}
+        while not self._stop.wait(self.poll_interval):
+            events, pending = self._update(list(self.folders) or [self.root], pending)
+            self._emit(events)
+
+
+def update_texture_materials(events, folder_path, matnet=None, mattype=MatType.Redshift):
+    """Apply TextureWatcher events to the materials made by build_texture_materials.
+
+    New sets get a new material, new and changed textures are wired in or pointed at the new file.
+    Removed textures are left in place but greyed out and commented, like retired materials in
+    GenerateMaterials.
+    """
+    if matnet is None:
+        matnet = hou.node('/mat')
+    new_sets = defaultdict(dict)
+    with hou.undos.group('Update Texture Materials'):
+        for event in events:
+            if event.texture_type not in SHADER_INPUTS:
+                continue
+            vopnet = matnet.node(_material_name(event.set_name))
+            if vopnet is None:
+                if event.kind != 'removed':
+                    new_sets[event.set_name][event.texture_type] = [event.file_name]
+                continue
+            texture = vopnet.node(f"{event.texture_type}_tex")
+            if event.kind == 'removed':
+                if texture is not None:
+                    texture.setColor(hou.Color((0.3, 0.3, 0.3)))
+                    texture.setComment('Missing: ' + event.file_name)
+                    texture.setGenericFlag(hou.nodeFlag.DisplayComment, True)
+            elif texture is None:
+                if vopnet.type().name() == MatType.Redshift.value:
+                    _wire_redshift(vopnet, {event.texture_type: event.file_name}, folder_path)
+                else:
+                    _wire_mtlx(vopnet, {event.texture_type: event.file_name}, folder_path)
+            else:
+                parm = texture.parm('tex0') or texture.parm('file')
+                parm.set(_texture_path(folder_path, event.file_name))
+                texture.setComment('')
+                texture.setGenericFlag(hou.nodeFlag.DisplayComment, False)
+        if new_sets:
+            build_texture_materials(new_sets, folder_path, matnet, mattype)
+
+
+def watch_texture_sets(folder_path, matnet=None, mattype=MatType.Redshift, recursive=True):
+    """Keep the materials of folder_path up to date while texture artists export into it.
+
+    Returns the running TextureWatcher, call stop() on it to end watching. Updates are handed to
+    the Houdini main thread since hou is not thread safe.
+    """
+    def apply(events):
+        for event in events:
+            print(f"{event.kind}: {event.set_name} {event.texture_type} {event.file_name}")
+        update_texture_materials(events, folder_path, matnet, mattype)
+
+    def callback(events):
+        if hou.isUIAvailable():
+            import hdefereval
+            hdefereval.executeDeferred(lambda: apply(events))
+        else:
+            apply(events)
+
+    watcher = TextureWatcher(folder_path, callback, recursive).start()
+    print(f"Watching {folder_path} ({watcher.backend}, {len(watcher.folders)} folders)")
+    return watcher
+
+
 # Example usage
 
 print('\n\nTextures:\n\n')
-texture_sets  = list_texture_sets()
+folder_path = hou.ui.selectFile(title="Select Folder of Textures", collapse_sequences=False, file_type=hou.fileType.Directory)
+texture_sets  = list_texture_sets(folder_path=folder_path)
 pprint(texture_sets)
 
 
@@ -122,5 +800,4 @@ print('\n\nTexture Set ' + set_name + '\n')
 textures = get_textures_for_set(texture_sets, set_name)
 pprint(textures)
 
-
-
+build_materials_dialog(texture_sets, folder_path)
@@ -1,24 +1,32 @@
 import hou, os, json
 import sys
 import re
+import threading
 
-try:
-    import PySide2_External #hacky internal fix for missing PySide QtUiUTils in Houdini 
-except:
-    print('Hack fix: PySide2_External not found')
-    
-from PySide2 import QtCore, QtUiTools, QtWidgets, QtGui 
-from PySide2.QtUiTools import QUiLoader
-import tkinter as tk
-from tkinter import filedialog
-from tronoutils import main as utils
-
-# default variables
-_uiFile = r'Z:/_Assets/3D/0_SharedScripts/Houdini/py_scripts/projectstarter/ProjectStart.ui'
-_configfile = r'Z:/_Assets/3D/0_SharedScripts/Houdini/py_scripts/projectstarter/FolderStructure.json'
+# PySide2 is already loaded by Houdini. QtUiTools, tkinter and tronoutils are only imported when needed
+from PySide2 import QtCore, QtWidgets, QtGui
+
+from projectUtils import DiffLibraries, FindProjects, HdaLibraryCache, ProjectRegistry, ProjectScaffold, ScanPathFolders
+
+# default variables (the environment variables let the panel run against a local copy)
+_uiFile = os.environ.get('PROJECTSTARTER_UI', r'Z:/_Assets/3D/0_SharedScripts/Houdini/py_scripts/projectstarter/ProjectStart.ui')
+_configfile = os.environ.get('PROJECTSTARTER_CONFIG', r'Z:/_Assets/3D/0_SharedScripts/Houdini/py_scripts/projectstarter/FolderStructure.json')
 _lastProjectFile = os.path.join(os.path.expanduser("~"), '.tronotools', 'lastprojects.json')
+_registryFile = os.path.join(os.path.expanduser("~"), '.tronotools', 'projects.sqlite')
+# Projects in the dropdown, and search results shown while typing in it
 _maxProjectsToSave = 10
+_maxSearchResults = 50
+# How many folder levels below the project root are searched for existing projects
+_crawlDepth = 2
 _prjRegEx = r"(?P<prjid>\d\d-\w{3,}-.*-\d{4,})(-|_)(?P<prjname>.*)"
+_sessionKey = '_projectStarterCache'
+# Project variables, and the ones shown in the variable table (one per row)
+_projectVariables = ('JOB', 'PRJID', 'PRJNAME', 'PRJ', 'OUT', 'CACHE', 'PRJHDA', 'PRJSCRIPT')
+_tableVariables = ('JOB', 'PRJ', 'OUT', 'CACHE', 'PRJHDA', 'PRJSCRIPT')
+# Typing only refreshes the variable table after this many ms without a key press
+_refreshDelay = 100
+_okBrush = QtGui.QBrush(QtGui.QColor(0, 255, 0))
+_wrongBrush = QtGui.QBrush(QtGui.QColor(255, 0, 0))
 
 
 def loadjson(file):
@@ -41,10 +49,163 @@ def loadjson(file):
     return data
     
         
-def savejson(file, data):
-    with open(file, 'w') as file:
-        json.dump(data, file, indent=4)
-        
+def sessionCache():
+    # hou.session lives for the whole Houdini session. Module globals don't, the shelf tool runs this file again on every open
+    cache = getattr(hou.session, _sessionKey, None)
+    if cache is None:
+        cache = {}
+        setattr(hou.session, _sessionKey, cache)
+    return cache
+
+
+def fileMtime(file):
+    try:
+        return os.path.getmtime(file)
+    except OSError:
+        return None
+
+
+def loadjsonCached(file):
+    # Same as loadjson, but only reads the file again when its mtime changed
+    cache = sessionCache().setdefault('json', {})
+    mtime = fileMtime(file)
+    cached = cache.get(file)
+    if mtime is not None and cached is not None and cached[0] == mtime:
+        return cached[1]
+    data = loadjson(file)
+    cache[file] = (fileMtime(file), data)
+    return data
+
+
+def loadUi(file, parent):
+    # The .ui xml is kept in memory (keyed by mtime), only QUiLoader has to run on a new window
+    try:
+        import PySide2_External #hacky internal fix for missing PySide QtUiUTils in Houdini 
+    except:
+        print('Hack fix: PySide2_External not found')
+    from PySide2.QtUiTools import QUiLoader
+
+    cache = sessionCache()
+    mtime = fileMtime(file)
+    cached = cache.get('ui')
+    if cached is None or cached[0] != mtime:
+        with open(file, 'rb') as f:
+            cached = (mtime, f.read())
+        cache['ui'] = cached
+    buffer = QtCore.QBuffer()
+    buffer.setData(QtCore.QByteArray(cached[1]))
+    buffer.open(QtCore.QIODevice.ReadOnly)
+    return QUiLoader().load(buffer, parentWidget=parent)
+
+
+def openRegistry():
+    # One registry connection per session. The first time, the old lastprojects.json is imported
+    cache = sessionCache()
+    registry = cache.get('registry')
+    if registry is None:
+        registry = ProjectRegistry(_registryFile)
+        if len(registry) == 0 and os.path.isfile(_lastProjectFile):
+            registry.importJson(_lastProjectFile)
+        cache['registry'] = registry
+    return registry
+
+
+def crawlProjects(root):
+    # Runs on a background thread with its own connection, the panel sees the result on its next search
+    registry = ProjectRegistry(_registryFile)
+    try:
+        registry.add(FindProjects(root, _prjRegEx, _crawlDepth))
+    finally:
+        registry.close()
+
+
+def setHdaScanPath(scanPath):
+    # Instead of hou.hda.reloadAllFiles only the libraries that differ between the old and new scan path
+    # are installed or uninstalled, and the ones saved since they were loaded are reloaded
+    cache = sessionCache()
+    libraries = cache.get('hdaLibraries')
+    if libraries is None:
+        libraries = cache['hdaLibraries'] = HdaLibraryCache()
+    folders = ScanPathFolders(scanPath, hou.text.expandString)
+    if libraries.installed is None:
+        # First time in this session: whatever the current scan path loaded
+        oldFolders = ScanPathFolders(hou.getenv('HOUDINI_OTLSCAN_PATH'), hou.text.expandString)
+        loaded = set(os.path.normpath(file).replace('\\', '/') for file in hou.hda.loadedFiles())
+        libraries.installed = {file: mtime for file, mtime in libraries.files(oldFolders + folders).items() if file in loaded}
+    
+    hou.putenv('HOUDINI_OTLSCAN_PATH', scanPath)
+    found = libraries.files(folders)
+    added, removed, changed = DiffLibraries(libraries.installed, found)
+    # The scan path is not saved in the OPlibraries file, so neither are these
+    for file in removed:
+        hou.hda.uninstallFile(file, change_oplibraries_file=False)
+    for file in added:
+        hou.hda.installFile(file, change_oplibraries_file=False)
+    for file in changed:
+        hou.hda.reloadFile(file)
+    libraries.installed = found
+    return added, removed, changed
+
+
+def fixpath(path, new_sep='/'):
+    from tronoutils import main as utils
+    return utils.fixpath(path, new_sep=new_sep)
+
+
+class VariableSync(object):
+    # Reads all project variables in one go and keeps them until they are written.
+    # Unset variables read as None
+    def __init__(self, names=_projectVariables):
+        self.names = names
+        self._values = None
+
+    def values(self):
+        if self._values is None:
+            self._values = {name: hou.getenv(name) for name in self.names}
+        return self._values
+
+    def get(self, name):
+        value = self.values().get(name)
+        return '' if value is None else value
+
+    def invalidate(self):
+        # Variables may have been changed outside the panel
+        self._values = None
+
+    def write(self, values):
+        # Only variables that changed are written. Returns the changed ones
+        current = self.values()
+        changed = {name: value for name, value in values.items() if current.get(name) != value}
+        for name, value in changed.items():
+            if current.get(name) is None:
+                #CREATE THE VARIABLE FIRST TO BE ABLE TO WRITE IT AND SEE IT IN THE VARIABLE PANEL
+                hou.hscript('setenv ' + name + ' = replaceme')
+            hou.putenv(name, value)
+        current.update(changed)
+        return changed
+
+
+class ScaffoldRunner(QtCore.QObject):
+    # Runs a ProjectScaffold on a background thread. The signals arrive on the UI thread
+    progress = QtCore.Signal(int, int, str)
+    finished = QtCore.Signal(str)
+    failed = QtCore.Signal(str)
+
+    def __init__(self, scaffold, parent=None):
+        super(ScaffoldRunner, self).__init__(parent)
+        self.scaffold = scaffold
+
+    def start(self):
+        threading.Thread(target=self._run, name='ProjectScaffold', daemon=True).start()
+
+    def _run(self):
+        try:
+            self.scaffold.run(self.progress.emit)
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished.emit(self.scaffold.root)
+
 
 class ProjectStarter(QtWidgets.QWidget):
     data = None
@@ -55,7 +216,6 @@ class ProjectStarter(QtWidgets.QWidget):
     _hdaGlobalDir = None
     _scriptDir = None
     _jobVariable = None
-    _qBoxActivated = 0
     _lastProjectsList = []
     # FPS Controls to be implemented
     _FPS = hou.fps()
@@ -65,10 +225,52 @@ class ProjectStarter(QtWidgets.QWidget):
         if self.startupChecks() == -1:
             return
             
-        self.ui = QUiLoader().load(_uiFile, parentWidget=self)
+        self.ui = loadUi(_uiFile, self)
         self.setParent(hou.ui.mainQtWindow(), QtCore.Qt.Window)
 
-        self.data = loadjson(_configfile)
+        self.loadConfig()
+        self.variables = VariableSync()
+        self.registry = openRegistry()
+
+        # initialize ui
+        # Typing restarts the timer, the table is refreshed once typing pauses
+        self._refreshTimer = QtCore.QTimer(self)
+        self._refreshTimer.setSingleShot(True)
+        self._refreshTimer.setInterval(_refreshDelay)
+        self._refreshTimer.timeout.connect(self.projectNameChanged)
+        self.ui.linePrjId.textChanged.connect(self.scheduleRefresh)
+        self.ui.linePrjName.textChanged.connect(self.scheduleRefresh)
+        self.ui.linePrjDir.textChanged.connect(self.scheduleRefresh)
+        self.ui.lastProjects.currentIndexChanged.connect(self.lastProjectChanged)
+        # Typing in the dropdown searches all known projects
+        self._searchResults = []
+        self._searchModel = QtCore.QStringListModel(self)
+        self._completer = QtWidgets.QCompleter(self._searchModel, self)
+        self._completer.setCompletionMode(QtWidgets.QCompleter.UnfilteredPopupCompletion)
+        self._completer.activated[str].connect(self.searchResultChosen)
+        self.ui.lastProjects.setEditable(True)
+        self.ui.lastProjects.setInsertPolicy(QtWidgets.QComboBox.NoInsert)
+        self.ui.lastProjects.setCompleter(self._completer)
+        self.ui.lastProjects.lineEdit().textEdited.connect(self.searchProjects)
+                
+        #Append to and adjust table
+        self.ui.tableVariables.setColumnWidth(1, 500)
+        rowPosition = self.ui.tableVariables.rowCount()
+        self.ui.tableVariables.insertRow(rowPosition)
+        self.ui.tableVariables.setItem(rowPosition, 0, QtWidgets.QTableWidgetItem('HDA'))
+        rowPosition += 1
+        self.ui.tableVariables.insertRow(rowPosition)
+        self.ui.tableVariables.setItem(rowPosition, 0, QtWidgets.QTableWidgetItem('SCRIPTS'))
+        
+        # Setup "Create Project" button
+        self.ui.btnCreateProject.clicked.connect(self.createProject)
+        self.ui.btnBrowse.clicked.connect(self.browseDirs)
+        self.ui.btnSetupVariables.clicked.connect(self.setupVariables)
+    
+        self.refresh()
+
+    def loadConfig(self):
+        self.data = loadjsonCached(_configfile)
         self._projectDir = self.data['projectroot']
         self._cacheDir = self.data['cachedir']
         self._assetDir = self.data['assetdir']
@@ -76,55 +278,43 @@ class ProjectStarter(QtWidgets.QWidget):
         self._scriptDir = self.data['scriptdir']
         self._hdaGlobalDir = self.data['hdaglobaldir']
 
-        # initialize ui
-        self.ui.linePrjId.textChanged.connect(self.projectNameChanged)
-        self.ui.linePrjName.textChanged.connect(self.projectNameChanged)
-        self.ui.linePrjDir.textChanged.connect(self.projectNameChanged)
-        self.ui.lastProjects.currentIndexChanged.connect(self.lastProjectChanged)
-             
+    def refresh(self):
+        # Fill the UI from the current variables. Runs on every open, also when the window is reused
+        self.loadConfig()
+        self.variables.invalidate()
+        values = self.variables.values()
+        projectDir = self._projectDir
 
-        if hou.hscriptExpression("isvariable(PRJ)") == 1:
-            prjName = hou.hscriptExpression("$PRJ")
-        else:
-            prjName = ""
-    
+        prjName = self.variables.get('PRJ')
         
         # check if a job varaible is already set and use it to fill the UI      
-        if hou.hscriptExpression("isvariable(JOB)") == 1:
-            jobVar = hou.hscriptExpression("$JOB")
+        if values['JOB'] is not None:
+            jobVar = values['JOB']
             jobArray = jobVar.split("/")
             prjName = jobArray[len(jobArray)-1]
             head, tail = os.path.split(jobVar)
             projectDir = head
-        if hou.hscriptExpression("isvariable(PRJID)") == 1 and hou.hscriptExpression("isvariable(PRJNAME)") == 1:
-            id = hou.hscriptExpression("$PRJID")
-            prjName = hou.hscriptExpression("$PRJNAME") 
+        if values['PRJID'] is not None and values['PRJNAME'] is not None:
+            id = values['PRJID']
+            prjName = values['PRJNAME']
             if id != 'replaceme':
                 self.ui.linePrjId.setText(id)
-                
-        #Append to and adjust table
-        self.ui.tableVariables.setColumnWidth(1, 500)
-        rowPosition = self.ui.tableVariables.rowCount()
-        self.ui.tableVariables.insertRow(rowPosition)
-        self.ui.tableVariables.setItem(rowPosition, 0, QtWidgets.QTableWidgetItem('HDA'))
-        rowPosition += 1
-        self.ui.tableVariables.insertRow(rowPosition)
-        self.ui.tableVariables.setItem(rowPosition, 0, QtWidgets.QTableWidgetItem('SCRIPTS'))
         
         # Fill UI input fields
         self.ui.linePrjName.setText(prjName)
         self.ui.linePrjDir.setText(projectDir)
+        self.refreshNow()
         self.updateVariableTable()
-        self.ui.linePrjName.setText(prjName)
-                
-        # Setup "Create Project" button
-        self.ui.btnCreateProject.clicked.connect(self.createProject)
-        self.ui.btnBrowse.clicked.connect(self.browseDirs)
-        self.ui.btnSetupVariables.clicked.connect(self.setupVariables)
     
         #Load last projects list
         self.loadPrjList()
 
+        # Find the projects on disk once per session
+        cache = sessionCache()
+        if cache.get('crawled') != self._projectDir and os.path.isdir(self._projectDir):
+            cache['crawled'] = self._projectDir
+            threading.Thread(target=crawlProjects, args=(self._projectDir,), name='ProjectCrawler', daemon=True).start()
+
     
     #Create Project functions
     def startupChecks(self):
@@ -138,6 +328,8 @@ class ProjectStarter(QtWidgets.QWidget):
         return 1
     
     def createProject(self):
+        # A field edit may still be waiting on the refresh timer
+        self.refreshNow()
         prjId = self.ui.linePrjId.text()
         prjName = self.ui.linePrjName.text()
         dir = self.ui.linePrjDir.text()
@@ -145,7 +337,7 @@ class ProjectStarter(QtWidgets.QWidget):
         if prjId != '':
             prjName = prjId + '-' + prjName
         
-        dir = utils.fixpath(dir)
+        dir = fixpath(dir)
         
         if len(prjName) < 1:
             hou.ui.displayMessage('Please enter a project name!')
@@ -158,55 +350,49 @@ class ProjectStarter(QtWidgets.QWidget):
             hou.ui.displayMessage('Project Directory already exists!')
             return
         
-        folders = []
-        
         #load the json with folder structure
-        data = loadjson(_configfile)
-        
-        #create the array of folders
-        for item in data['folders']:
-            folders.append(item)            
+        data = loadjsonCached(_configfile)
         
-        #create the folders
-        winpath = utils.fixpath(prjPath, new_sep='\\')
+        #create the folders and copy the template files, off the UI thread
+        winpath = fixpath(prjPath, new_sep='\\')
         print ('Creating folder structure at ' + winpath)
 
-        for folder in folders:
-            os.makedirs(prjPath + folder)
-            #print prjPath + folder
+        scaffold = ProjectScaffold(prjPath, data['folders'], data.get('files', []))
+        self._scaffold = ScaffoldRunner(scaffold, self)
+        self._scaffold.progress.connect(self.scaffoldProgress)
+        self._scaffold.finished.connect(lambda path: self.projectCreated(dir, winpath))
+        self._scaffold.failed.connect(self.scaffoldFailed)
+        self.ui.btnCreateProject.setEnabled(False)
+        self._scaffold.start()
+
+    def scaffoldProgress(self, done, total, path):
+        hou.ui.setStatusMessage('Creating project {0}/{1}: {2}'.format(done, total, path))
+
+    def scaffoldFailed(self, error):
+        self.ui.btnCreateProject.setEnabled(True)
+        hou.ui.setStatusMessage('')
+        hou.ui.displayMessage('Creating the project failed, nothing was created.\n\n' + error)
+
+    def projectCreated(self, dir, winpath):
+        self.ui.btnCreateProject.setEnabled(True)
+        hou.ui.setStatusMessage('')
         #setup the variables
         self.setupVariables()
         
-        self._lastProjectsList = loadjson(_lastProjectFile)
-        
-        #Save project to last projects list
-        prj_data = {
-            
-                'prjId': self.ui.linePrjId.text(),
-                'prjName': self.ui.linePrjName.text(),
-                'prjPath': dir,
-                'outPath': self.ui.tableVariables.item(2,1).text(),
-                'cachePath': self.ui.tableVariables.item(3,1).text(),
-                'hdaPath': self.ui.tableVariables.item(4,1).text(),
-                'scriptPath': self.ui.tableVariables.item(5,1).text(),
-            }
-        prj_name = prj_data['prjId'] + '-' + prj_data['prjName']
-        newprj = []
-        newprj.append(prj_name)
-        newprj.append(prj_data)
-        self._lastProjectsList.insert(0, newprj)
-        
-        #Save project list
-        savejson(_lastProjectFile, self._lastProjectsList[:_maxProjectsToSave])
-        #Refresh dropdown list
-        self.loadPrjList()
-        
         print ('done!')
         
         if hou.ui.displayMessage('Project created!', buttons=('OK', 'Open in Explorer')) == 1:
             os.startfile(winpath)
         
         
+    def scheduleRefresh(self, *args):
+        self._refreshTimer.start()
+
+    def refreshNow(self):
+        # For code that sets the fields and needs the table right away
+        self._refreshTimer.stop()
+        self.projectNameChanged()
+
     #keep things updated as project name is changed
     def projectNameChanged(self):
         dir = self.ui.linePrjDir.text()
@@ -214,15 +400,19 @@ class ProjectStarter(QtWidgets.QWidget):
         prjName = self.ui.linePrjName.text()
         
         # Remove spaces and backslashes and update UI
-        dir = utils.fixpath(dir)
-        prjId = utils.fixpath(prjId)
-        prjName = utils.fixpath(prjName)
+        dir = fixpath(dir)
+        prjId = fixpath(prjId)
+        prjName = fixpath(prjName)
         
         
 
-        self.ui.linePrjDir.setText(dir)
-        self.ui.linePrjId.setText(prjId)
-        self.ui.linePrjName.setText(prjName)
+        # setText would move the cursor and fire textChanged again, so only when fixpath changed something
+        if dir != self.ui.linePrjDir.text():
+            self.ui.linePrjDir.setText(dir)
+        if prjId != self.ui.linePrjId.text():
+            self.ui.linePrjId.setText(prjId)
+        if prjName != self.ui.linePrjName.text():
+            self.ui.linePrjName.setText(prjName)
         
         if prjId != '':
             prjName = prjId + '-' + prjName
@@ -241,6 +431,9 @@ class ProjectStarter(QtWidgets.QWidget):
     #browse directories button
     def browseDirs(self):
         #print 'browse dirs pressed'
+        # tkinter is slow to import and only needed here
+        import tkinter as tk
+        from tkinter import filedialog
         root = tk.Tk()
         root.withdraw()
 
@@ -264,10 +457,12 @@ class ProjectStarter(QtWidgets.QWidget):
         
     def updateVariableTable(self):
         #print self.ui.tableVariables.item(0,0).text()
-        jobVar = hou.hscriptExpression('$JOB')
+        jobVar = self.variables.get('JOB')
         self.ui.tableVariables.setItem(0,1, QtWidgets.QTableWidgetItem(jobVar))
         
     def setupVariables(self):
+        # The table is only refreshed after a pause in typing, bring it up to date with the fields
+        self.refreshNow()
         name = self.ui.linePrjName.text()
         id = self.ui.linePrjId.text()
         jobVarUI = self.ui.tableVariables.item(0,1).text()
@@ -277,24 +472,17 @@ class ProjectStarter(QtWidgets.QWidget):
         hdaVarUI = self.ui.tableVariables.item(4,1).text()
         scriptVarUI = self.ui.tableVariables.item(5,1).text()
         
-        #CREATE THE VARIABLES FIRST TO BE ABLE TO WRITE THEM AND SEE THEM IN THE VARIABLE PANEL
-        hou.hscript('setenv JOB = replaceme')
-        hou.hscript('setenv PRJID = replaceme')
-        hou.hscript('setenv PRJNAME = replaceme')
-        hou.hscript('setenv PRJ = replaceme')
-        hou.hscript('setenv OUT = replaceme')
-        hou.hscript('setenv CACHE = replaceme')
-        hou.hscript('setenv PRJHDA = replaceme')
-        hou.hscript('setenv PRJSCRIPT = replaceme')
-            
-        hou.putenv('JOB', jobVarUI)
-        hou.putenv('PRJID', id)
-        hou.putenv('PRJNAME', name)
-        hou.putenv('PRJ', prjVarUI)
-        hou.putenv('OUT', outVarUI)
-        hou.putenv('CACHE', cacheVarUI)
-        hou.putenv('PRJHDA', hdaVarUI)
-        hou.putenv('PRJSCRIPT', scriptVarUI)
+        # Only changed variables are written, new ones are created first
+        self.variables.write({
+            'JOB': jobVarUI,
+            'PRJID': id,
+            'PRJNAME': name,
+            'PRJ': prjVarUI,
+            'OUT': outVarUI,
+            'CACHE': cacheVarUI,
+            'PRJHDA': hdaVarUI,
+            'PRJSCRIPT': scriptVarUI,
+        })
         
         # Update houdini internal search paths
         # Append project script directory (TODO: Remove when changing projects)
@@ -307,14 +495,9 @@ class ProjectStarter(QtWidgets.QWidget):
             self._hdaGlobalDir,
         ]
         
-        hou.putenv('HOUDINI_OTLSCAN_PATH', ';'.join(hda_paths)) 
+        setHdaScanPath(';'.join(hda_paths))
         
-        
-        hou.hda.reloadAllFiles()
-        
-        self._lastProjectsList = loadjson(_lastProjectFile)
-        
-        #Save project to last projects list
+        #Save project to the registry, a project is the same project when the path is the same
         prj_data = {
             
                 'prjId': self.ui.linePrjId.text(),
@@ -326,13 +509,7 @@ class ProjectStarter(QtWidgets.QWidget):
                 'scriptPath': self.ui.tableVariables.item(5,1).text(),
             }
         prj_name = prj_data['prjId'] + '-' + prj_data['prjName']
-        newprj = []
-        newprj.append(prj_name)
-        newprj.append(prj_data)
-        self._lastProjectsList.insert(0, newprj)
-        
-        #Save project list
-        savejson(_lastProjectFile, self._lastProjectsList[:_maxProjectsToSave])
+        self.registry.touch(jobVarUI, prj_name, prj_data)
         #Refresh dropdown list
         self.loadPrjList()
         
@@ -341,104 +518,83 @@ class ProjectStarter(QtWidgets.QWidget):
         self.checkVariables()
        
     def loadPrjList(self):
-        self._lastProjectsList = loadjson(_lastProjectFile)
+        self._lastProjectsList = [[name, data] for name, data in self.registry.recent(_maxProjectsToSave)]
         
         names = []
         for item in self._lastProjectsList:
             names.append(item[0])
             
         # Clear old items and add project names to dropbox
+        # Signals are blocked so refilling the list doesn't load a project
+        self.ui.lastProjects.blockSignals(True)
         self.ui.lastProjects.clear()
         self.ui.lastProjects.addItems(names)
+        self.ui.lastProjects.blockSignals(False)
+
+    def searchProjects(self, text):
+        self._searchResults = self.registry.search(text, _maxSearchResults)
+        self._searchModel.setStringList([name for name, data in self._searchResults])
+        if self._searchResults:
+            self._completer.complete()
+
+    def searchResultChosen(self, name):
+        for resultName, data in self._searchResults:
+            if resultName == name:
+                self.loadProject(data)
+                return
         
     def lastProjectChanged(self, s):
-        #Function triggers as list populates. Avoid running the code on first run
-        if self._qBoxActivated == 0:
-            self._qBoxActivated = 1
+        if s < 0 or s >= len(self._lastProjectsList):
             return
-            
-        prjdata = self._lastProjectsList[s][1]
+        self.loadProject(self._lastProjectsList[s][1])
+
+    def loadProject(self, prjdata):
         self.ui.linePrjId.setText(prjdata['prjId'])
         self.ui.linePrjName.setText(prjdata['prjName'])
         self.ui.linePrjDir.setText(prjdata['prjPath'])
+        self.refreshNow()
         self.ui.tableVariables.setItem(0,1, QtWidgets.QTableWidgetItem(prjdata['prjPath'] + '/' + prjdata['prjId'] + '-' + prjdata['prjName']))
         self.ui.tableVariables.setItem(1,1, QtWidgets.QTableWidgetItem(prjdata['prjId'] + '-' + prjdata['prjName']))
-        self.ui.tableVariables.setItem(2,1, QtWidgets.QTableWidgetItem(prjdata['outPath']))
-        self.ui.tableVariables.setItem(3,1, QtWidgets.QTableWidgetItem(prjdata['cachePath']))
+        # Projects found on disk only have id, name and path, the rest comes from the template
+        if 'outPath' in prjdata:
+            self.ui.tableVariables.setItem(2,1, QtWidgets.QTableWidgetItem(prjdata['outPath']))
+        if 'cachePath' in prjdata:
+            self.ui.tableVariables.setItem(3,1, QtWidgets.QTableWidgetItem(prjdata['cachePath']))
         
         self.checkVariables()
     
     def checkVariables(self):
-        #Have to check if variables exists, to avoid undefined error
-        if hou.hscriptExpression("isvariable(JOB)") == 1:
-            jobVar = hou.hscriptExpression("$JOB")
-        else:
-            jobVar = ""
-        if hou.hscriptExpression("isvariable(PRJ)") == 1:
-            prjVar = hou.hscriptExpression("$PRJ")
-        else:
-            prjVar = ""
-        if hou.hscriptExpression("isvariable(PRJID)") == 1:
-            idVar = hou.hscriptExpression("$PRJID")
-        else:
-            idVar = ""
-        if hou.hscriptExpression("isvariable(PRJNAME)") == 1:
-            nameVar = hou.hscriptExpression("$PRJNAME")
-        else:
-            nameVar = ""
-        if hou.hscriptExpression("isvariable(OUT)") == 1:
-            outVar = hou.hscriptExpression("$OUT")
-        else:
-            outVar = ""
-        if hou.hscriptExpression("isvariable(CACHE)") == 1:
-            cacheVar = hou.hscriptExpression("$CACHE")
-        else:
-            cacheVar = ""
-        if hou.hscriptExpression("isvariable(PRJHDA)") == 1:
-            hdaVar = hou.hscriptExpression("$PRJHDA")
-        else:
-            hdaVar = ""
-        if hou.hscriptExpression("isvariable(PRJSCRIPT)") == 1:
-            scriptVar = hou.hscriptExpression("$PRJSCRIPT")
-        else:
-           scriptVar = ""
-        
-        jobVarUI = self.ui.tableVariables.item(0,1).text()
-        prjVarUI = self.ui.tableVariables.item(1,1).text()
-        outVarUI = self.ui.tableVariables.item(2,1).text()
-        cacheVarUI = self.ui.tableVariables.item(3,1).text()
-        hdaVarUI = self.ui.tableVariables.item(4,1).text()
-        scriptVarUI = self.ui.tableVariables.item(5,1).text()
-        
-        if jobVar == jobVarUI:        
-            self.ui.tableVariables.item(0,1).setForeground(QtGui.QBrush(QtGui.QColor(0, 255, 0)))
-        else:
-            self.ui.tableVariables.item(0,1).setForeground(QtGui.QBrush(QtGui.QColor(255, 0, 0)))
-            
-        if prjVar == prjVarUI:        
-            self.ui.tableVariables.item(1,1).setForeground(QtGui.QBrush(QtGui.QColor(0, 255, 0)))
-        else:
-            self.ui.tableVariables.item(1,1).setForeground(QtGui.QBrush(QtGui.QColor(255, 0, 0)))
-            
-        if outVar == outVarUI:        
-            self.ui.tableVariables.item(2,1).setForeground(QtGui.QBrush(QtGui.QColor(0, 255, 0)))
-        else:
-            self.ui.tableVariables.item(2,1).setForeground(QtGui.QBrush(QtGui.QColor(255, 0, 0)))
-            
-        if cacheVar == cacheVarUI:        
-            self.ui.tableVariables.item(3,1).setForeground(QtGui.QBrush(QtGui.QColor(0, 255, 0)))
-        else:
-            self.ui.tableVariables.item(3,1).setForeground(QtGui.QBrush(QtGui.QColor(255, 0, 0)))
-            
-        if hdaVar == hdaVarUI:        
-            self.ui.tableVariables.item(4,1).setForeground(QtGui.QBrush(QtGui.QColor(0, 255, 0)))
-        else:
-            self.ui.tableVariables.item(4,1).setForeground(QtGui.QBrush(QtGui.QColor(255, 0, 0)))
-            
-        if scriptVar == scriptVarUI:        
-            self.ui.tableVariables.item(5,1).setForeground(QtGui.QBrush(QtGui.QColor(0, 255, 0)))
-        else:
-            self.ui.tableVariables.item(5,1).setForeground(QtGui.QBrush(QtGui.QColor(255, 0, 0)))
+        # Green when the variable already has the value in the table, red otherwise.
+        # Values come from the VariableSync cache, nothing is read from Houdini here
+        for row, name in enumerate(_tableVariables):
+            item = self.ui.tableVariables.item(row, 1)
+            if item is None:
+                continue
+            if self.variables.get(name) == item.text():
+                item.setForeground(_okBrush)
+            else:
+                item.setForeground(_wrongBrush)
+
+def showProjectStarter():
+    # The window is kept for the session and only refreshed when opened again.
+    # A new one is made when the .ui file changed or Qt already deleted the old one
+    cache = sessionCache()
+    win = cache.get('window')
+    try:
+        reuse = win is not None and hasattr(win, 'ui') and cache.get('windowUi') == fileMtime(_uiFile)
+        if reuse:
+            win.refresh()
+    except RuntimeError:
+        reuse = False
+    if not reuse:
+        win = ProjectStarter()
+        if hasattr(win, 'ui'):
+            cache['window'] = win
+            cache['windowUi'] = fileMtime(_uiFile)
+    win.show()
+    win.raise_()
+    win.activateWindow()
+    return win
+
 
-win = ProjectStarter()
-win.show()
+win = showProjectStarter()
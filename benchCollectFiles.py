@@ -0,0 +1,257 @@
+# Benchmark for collectFiles, runs outside Houdini
+#
+# Scaling of AssetSet, the dedup stage of the collection pipeline, from 10k to 1M file references
+# against the list based dedup it replaced. Every file is added twice, the second time spelled
+# differently (${JOB}, backslashes), like two parms pointing at the same cache.
+#
+#   python benchCollectFiles.py [--entries 10000 100000 1000000] [--caches 50] [--old-max 20000]
+#
+# The old dedup is quadratic, it is only timed up to --old-max entries.
+#
+# Also counts parm evaluations of CollectSceneAssets on a mocked hou scene of --scene file caches,
+# each read through a channel reference and with its write out parm, against the original main pass.
+# Pass an empty --entries or --scene to skip that part.
+
+import argparse
+import collections
+import contextlib
+import io
+import os
+import runpy
+import shutil
+import sys
+import tempfile
+import time
+import types
+
+from collectUtils import AssetSet
+
+here = os.path.dirname(os.path.abspath(__file__))
+# Parm evaluations made by the script, by hou call
+calls = collections.Counter()
+
+
+def CacheFiles(count, caches):
+    # count references to file cache frames, spread over caches file caches. Each one is listed twice
+    frames = max(count // (caches * 2), 1)
+    for c in range(caches):
+        for f in range(frames):
+            yield '$JOB/geo/cache{0:02d}/v001/cache{0:02d}.{1:04d}.bgeo.sc'.format(c, f), '/obj/geo{0}/file{0}/file'.format(c)
+            yield '${{JOB}}\\geo\\cache{0:02d}\\v001\\cache{0:02d}.{1:04d}.bgeo.sc'.format(c, f), '/obj/geo{0}/filecache{0}/file'.format(c)
+
+
+def OldDedup(paths):
+    # "Filter list and delete duplicates" from the original CollectSceneAssets
+    FilteredAssets = []
+    for i in paths:
+        if i not in FilteredAssets:
+            FilteredAssets.append(i)
+    return FilteredAssets
+
+
+class OperationFailed(Exception):
+    pass
+
+
+class MockNode(object):
+    def __init__(self, hou, path, parms=None):
+        self.hou = hou
+        self._path = path
+        self.parms = parms or {}
+        self.ancestors = []
+        self.bypassed = False
+
+    def path(self):
+        return self._path
+
+    def parm(self, name):
+        return self.parms.get(name)
+
+    def isGenericFlagSet(self, flag):
+        return self.bypassed
+
+    def isBypassed(self):
+        return self.bypassed
+
+    def bypass(self, on):
+        self.bypassed = on
+
+    def inputAncestors(self):
+        return tuple(self.ancestors)
+
+
+class MockSopNode(MockNode):
+    pass
+
+
+class MockParm(object):
+    def __init__(self, node, name, raw='', value=None, ref=None):
+        self._node = node
+        self._name = name
+        self.raw = raw
+        self.value = value
+        self.ref = ref
+        node.parms[name] = self
+
+    def path(self):
+        return self._node.path() + '/' + self._name
+
+    def name(self):
+        return self._name
+
+    def node(self):
+        return self._node
+
+    def isDisabled(self):
+        return False
+
+    def getReferencedParm(self):
+        calls['getReferencedParm'] += 1
+        return self if self.ref is None else self.ref
+
+    def unexpandedString(self):
+        calls['unexpandedString'] += 1
+        return self.raw
+
+    def evalAtFrame(self, frame):
+        calls['evalAtFrame'] += 1
+        if self.value is not None:
+            return self.value
+        return self.raw.replace('$HIP', self._node.hou.hip).replace('$F4', '{0:04d}'.format(int(frame)))
+
+    def eval(self):
+        calls['eval'] += 1
+        return self.evalAtFrame(1)
+
+
+def MockScene(caches, frames, hip):
+    # Per file cache: the read file SOP, its write out parm and a file SOP elsewhere referencing
+    # the cache path, plus an unrelated texture. Returns the mocked hou module
+    hou = types.ModuleType('hou')
+    hou.hip = hip
+    hou.RopNode = type('RopNode', (MockNode,), {})
+    hou.SopNode = MockSopNode
+    hou.ObjNode = type('ObjNode', (MockNode,), {})
+    hou.OperationFailed = OperationFailed
+    hou.nodeFlag = types.SimpleNamespace(Bypass='bypass')
+    hou.updateMode = types.SimpleNamespace(Manual='manual')
+    hou.playbar = types.SimpleNamespace(playbackRange=lambda: frames)
+    hou.setUpdateMode = hou.setFrame = lambda value: None
+    hou.getenv = lambda name, default=None: hip if name in ('HIP', 'JOB') else default
+    hou.isUIAvailable = lambda: False
+    refs = []
+    for c in range(caches):
+        cache = '/obj/geo{0}/filecache{0}'.format(c)
+        read = MockSopNode(hou, cache + '/file', {})
+        MockParm(read, 'f1', value=frames[0])
+        MockParm(read, 'f2', value=frames[1])
+        readParm = MockParm(read, 'file', '$HIP/geo/cache{0}.$F4.bgeo.sc'.format(c))
+        write = MockSopNode(hou, cache + '/file_mode/rop_geometry', {})
+        writeParm = MockParm(write, 'sopoutput', readParm.raw)
+        linked = MockNode(hou, '/obj/geo{0}/linked'.format(c), {})
+        linkedParm = MockParm(linked, 'file', readParm.raw, ref=readParm)
+        shader = MockNode(hou, '/mat/shader{0}'.format(c), {})
+        textureParm = MockParm(shader, 'tex0', '$HIP/tex/shader{0}.exr'.format(c))
+        refs += [(readParm, readParm.raw), (writeParm, writeParm.raw), (linkedParm, linkedParm.raw), (textureParm, textureParm.raw)]
+    hou.fileReferences = lambda: tuple(refs)
+    return hou
+
+
+def OldCollectSceneAssets(hou, frameRange):
+    # The main pass of the original CollectSceneAssets: ten getReferencedParm calls per parm and
+    # every frame of a file cache evaluated. Its loop bugs are fixed and write outs skipped, so it finds the same files
+    SceneAssets = []
+    for file_parm, file in hou.fileReferences():
+        if file_parm is None:
+            continue
+        if type(file_parm.node()) == hou.RopNode:
+            continue
+        for i in range(10):
+            file_parm = file_parm.getReferencedParm()
+        if file_parm.isDisabled():
+            continue
+        if file_parm.node().isGenericFlagSet(hou.nodeFlag.Bypass):
+            continue
+        if isinstance(file_parm.node(), hou.SopNode) and file_parm.name() == "file":
+            if "file_mode" in file_parm.path().split("/"):
+                continue
+            startFr = max(file_parm.node().parm("f1").eval(), frameRange[0])
+            endFr = min(file_parm.node().parm("f2").eval(), frameRange[1])
+            for i in range(int(startFr), int(endFr) + 1):
+                SceneAssets.append(file_parm.evalAtFrame(i))
+            continue
+        if file_parm.name() in ('sopoutput',):
+            continue
+        SceneAssets.append(file_parm.eval())
+    FilteredAssets = []
+    seen = set()
+    for i in SceneAssets:
+        if i not in seen:
+            seen.add(i)
+            FilteredAssets.append(i)
+    return FilteredAssets
+
+
+def CountEvaluations(caches, frames, hip):
+    sys.modules['hou'] = hou = MockScene(caches, frames, hip)
+    script = runpy.run_path(os.path.join(here, 'collectFiles.py'))
+    calls.clear()
+    old = OldCollectSceneAssets(hou, frames)
+    oldCalls = sum(calls.values())
+    calls.clear()
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = script['CollectSceneAssets'](script['settings'], frames)
+    newCalls = sum(calls.values())
+    assert sorted(old) == sorted(report.assets), 'old and new collect different files'
+    return len(hou.fileReferences()), len(old), oldCalls, newCalls
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time AssetSet and count CollectSceneAssets parm evaluations against the old code')
+    parser.add_argument('--entries', type=int, nargs='*', default=[10000, 100000, 1000000])
+    parser.add_argument('--caches', type=int, default=50)
+    parser.add_argument('--old-max', type=int, default=20000, help='largest size the old list dedup is timed on')
+    parser.add_argument('--scene', type=int, nargs='*', default=[10, 50, 200], help='file caches in the mocked scene')
+    parser.add_argument('--frames', type=int, nargs=2, default=[1001, 1100], help='file cache frame range')
+    args = parser.parse_args(argv)
+
+    job = tempfile.mkdtemp()
+    try:
+        if args.entries:
+            DedupBenchmark(args, job)
+        if args.scene:
+            EvaluationCount(args, job)
+    finally:
+        shutil.rmtree(job, ignore_errors=True)
+    return 0
+
+
+def EvaluationCount(args, hip):
+    print('\n{0:>10} {1:>8} {2:>10} {3:>10} {4:>8}'.format('references', 'files', 'old evals', 'new evals', 'fewer'))
+    for caches in args.scene:
+        refs, files, old, new = CountEvaluations(caches, args.frames, hip)
+        print('{0:>10} {1:>8} {2:>10} {3:>10} {4:>7.0f}x'.format(refs, files, old, new, old / float(new)))
+
+
+def DedupBenchmark(args, job):
+    print('{0:>10} {1:>8} {2:>10} {3:>10} {4:>10}'.format('entries', 'unique', 'AssetSet', 'per add', 'old list'))
+    for entries in args.entries:
+        refs = list(CacheFiles(entries, args.caches))
+        assets = AssetSet({'JOB': job})
+        start = time.perf_counter()
+        for path, parm in refs:
+            assets.add(path, parm)
+        seconds = time.perf_counter() - start
+        assert len(assets) * 2 == len(refs)
+        old = '-'
+        if len(refs) <= args.old_max:
+            # The old code only ever saw expanded paths, so give it the same spelling twice
+            expanded = [path.replace('${JOB}', job).replace('$JOB', job).replace('\\', '/') for path, parm in refs]
+            start = time.perf_counter()
+            OldDedup(expanded)
+            old = '{0:.3f}s'.format(time.perf_counter() - start)
+        print('{0:>10} {1:>8} {2:>9.3f}s {3:>8.2f}us {4:>10}'.format(len(refs), len(assets), seconds, seconds / len(refs) * 1e6, old))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
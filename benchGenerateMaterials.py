@@ -0,0 +1,325 @@
+# Benchmark for GenerateMaterials, runs outside Houdini against a mocked hou module
+#
+# Times CollectMaterialNames on fake geometry against the old per-prim loop it replaced, and a full
+# material build in Clone and Create mode. The mocked node graph counts hou calls, since on a real
+# scene every node or parm operation is what costs the time.
+#
+#   python benchGenerateMaterials.py [--prims 1000000 5000000 10000000] [--materials 300] [--old-max 1000000]
+#                                    [--builds 10 100 1000]
+#
+# The old loop takes minutes on the bigger sizes, it is only timed up to --old-max prims.
+# Pass an empty --prims or --builds to skip that part.
+
+import argparse
+import collections
+import contextlib
+import io
+import os
+import runpy
+import sys
+import time
+import types
+
+here = os.path.dirname(os.path.abspath(__file__))
+
+
+class FakePrim(object):
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def attribValue(self, name):
+        return self.value
+
+
+class FakeGeometry(object):
+    # Just enough of hou.Geometry for the material name readers
+    def __init__(self, values):
+        self.values = values
+
+    def findPrimAttrib(self, name):
+        return name if name == 'shop_materialpath' else None
+
+    def primStringAttribValues(self, name):
+        return tuple(self.values)
+
+    def prims(self):
+        return (FakePrim(value) for value in self.values)
+
+
+class FakeSop(object):
+    def __init__(self, geo):
+        self.geo = geo
+
+    def geometry(self):
+        return self.geo
+
+
+# hou calls made by the script, by name
+calls = collections.Counter()
+
+
+def Counted(function):
+    def wrapper(*args, **kwargs):
+        calls[function.__name__] += 1
+        return function(*args, **kwargs)
+    return wrapper
+
+
+class Vector2(list):
+    def __init__(self, values=(0, 0)):
+        super(Vector2, self).__init__(values)
+
+    def __add__(self, other):
+        return Vector2((self[0] + other[0], self[1] + other[1]))
+
+
+class MockParm(object):
+    def __init__(self, node, name):
+        self.node = node
+        self.name = name
+
+    @Counted
+    def set(self, value):
+        self.node.values[self.name] = value
+
+    @Counted
+    def eval(self):
+        return self.node.values.get(self.name, 0)
+
+
+class MockNode(object):
+    # A node network in memory, with the calls GenerateMaterials makes
+    nodes = {}
+
+    def __init__(self, parent, nodeType, name, geo=None):
+        self._parent = parent
+        self.nodeType = nodeType
+        self._name = name
+        self._children = collections.OrderedDict()
+        self.values = {}
+        self.userdata = {}
+        self._comment = ''
+        self._position = Vector2()
+        self.geo = geo
+        if parent is not None:
+            parent._children[name] = self
+        MockNode.nodes[self.path()] = self
+
+    def _uniqueName(self, name):
+        if name not in self._children:
+            return name
+        base = name.rstrip('0123456789')
+        i = int(name[len(base):] or 0) + 1
+        while base + str(i) in self._children:
+            i += 1
+        return base + str(i)
+
+    def path(self):
+        return '/' + self._name if self._parent is None else self._parent.path() + '/' + self._name
+
+    def name(self):
+        return self._name
+
+    def parent(self):
+        return self._parent
+
+    def geometry(self):
+        return self.geo
+
+    @Counted
+    def children(self):
+        return tuple(self._children.values())
+
+    @Counted
+    def node(self, name):
+        return self._children.get(name)
+
+    @Counted
+    def createNode(self, nodeType, name=None):
+        node = MockNode(self, nodeType, self._uniqueName(name or nodeType + '1'))
+        if nodeType == 'subnet':
+            MockNode(node, 'output', 'suboutput1')
+            MockNode(node, 'subinput', 'subinput1')
+        return node
+
+    @Counted
+    def destroy(self):
+        del self._parent._children[self._name]
+        MockNode.nodes.pop(self.path(), None)
+
+    @Counted
+    def setName(self, name, unique_name=False):
+        if name == self._name:
+            return
+        siblings = self._parent._children
+        name = self._parent._uniqueName(name)
+        del siblings[self._name]
+        self._name = name
+        siblings[name] = self
+
+    def copy(self, parent):
+        node = MockNode(parent, self.nodeType, parent._uniqueName(self._name))
+        node.values = dict(self.values)
+        for child in self._children.values():
+            child.copy(node)
+        return node
+
+    @Counted
+    def parm(self, name):
+        return MockParm(self, name)
+
+    @Counted
+    def setParms(self, values):
+        self.values.update(values)
+
+    @Counted
+    def position(self):
+        return Vector2(self._position)
+
+    @Counted
+    def setPosition(self, position):
+        self._position = Vector2(position)
+
+    @Counted
+    def moveToGoodPosition(self):
+        self._position = Vector2((0, -len(self._parent._children)))
+
+    @Counted
+    def setInput(self, index, node):
+        pass
+
+    @Counted
+    def setMaterialFlag(self, on):
+        pass
+
+    @Counted
+    def setColor(self, color):
+        pass
+
+    @Counted
+    def setComment(self, comment):
+        self._comment = comment
+
+    def comment(self):
+        return self._comment
+
+    @Counted
+    def setGenericFlag(self, flag, on):
+        pass
+
+    def userData(self, name):
+        return self.userdata.get(name)
+
+    def setUserData(self, name, value):
+        self.userdata[name] = value
+
+
+@Counted
+def copyNodesTo(nodes, parent):
+    return tuple(node.copy(parent) for node in nodes)
+
+
+def MockHou():
+    hou = types.ModuleType('hou')
+    hou.selectedNodes = lambda: []
+    hou.node = lambda path: MockNode.nodes.get(path)
+    hou.copyNodesTo = copyNodesTo
+    hou.Vector2 = Vector2
+    hou.Color = lambda rgb: rgb
+    hou.nodeFlag = types.SimpleNamespace(DisplayComment='comment')
+    hou.undos = types.SimpleNamespace(group=lambda label: contextlib.nullcontext())
+    return hou
+
+
+def LoadGenerateMaterials():
+    # The script runs its dialog at import. With nothing selected it only prints a hint
+    sys.modules['hou'] = MockHou()
+    with contextlib.redirect_stdout(io.StringIO()):
+        return runpy.run_path(os.path.join(here, 'GenerateMaterials.py'))
+
+
+def OldCollectMaterialNames(node):
+    # CollectMaterialNames before v1.2, kept for comparison
+    matlib = []
+    geo = node.geometry()
+    for prim in geo.prims():
+        matname = prim.attribValue('shop_materialpath')
+        if matname not in matlib:
+            matlib.append(matname)
+    return matlib
+
+
+def FakeMaterialSop(prims, materials):
+    names = ['/obj/fbx/materials/material_{0:04d}'.format(i) for i in range(materials)]
+    values = (names * (prims // materials + 1))[:prims]
+    return FakeSop(FakeGeometry(values))
+
+
+def BuildScene(materials):
+    MockNode.nodes = {}
+    obj = MockNode(None, 'obj', 'obj')
+    geo = obj.createNode('geo', 'import')
+    return geo.createNode('file', 'fbx_import'), FakeMaterialSop(materials, materials).geo
+
+
+def TimeBuild(script, materials, mattype, buildmode):
+    node, geo = BuildScene(materials)
+    node.geo = geo
+    calls.clear()
+    with contextlib.redirect_stdout(io.StringIO()):
+        seconds = Time(script['GenerateMaterialsFromGeo'], node, mattype, True, buildmode)[0]
+    matnet = node.parent().node('materials')
+    assert len(matnet._children) == materials
+    return seconds, sum(calls.values())
+
+
+def Time(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time GenerateMaterials with a mocked hou')
+    parser.add_argument('--prims', type=int, nargs='*', default=[1000000, 5000000, 10000000])
+    parser.add_argument('--materials', type=int, default=300)
+    parser.add_argument('--old-max', type=int, default=1000000, help='largest size the old per-prim loop is timed on')
+    parser.add_argument('--builds', type=int, nargs='*', default=[10, 100, 1000], help='material counts to build')
+    args = parser.parse_args(argv)
+
+    script = LoadGenerateMaterials()
+    if args.prims:
+        CollectBenchmark(script, args)
+    if args.builds:
+        BuildBenchmark(script, args)
+    return 0
+
+
+def CollectBenchmark(script, args):
+    print('{0:>10} {1:>10} {2:>10} {3:>10} {4:>8}'.format('prims', 'new', 'counts', 'old', 'speedup'))
+    for prims in args.prims:
+        node = FakeMaterialSop(prims, args.materials)
+        new, names = Time(script['CollectMaterialNames'], node)
+        counts, perMaterial = Time(script['CollectMaterialCounts'], node)
+        assert len(names) == len(perMaterial) == min(prims, args.materials)
+        if prims <= args.old_max:
+            old, oldNames = Time(OldCollectMaterialNames, node)
+            assert oldNames == names
+            print('{0:>10} {1:>9.3f}s {2:>9.3f}s {3:>9.3f}s {4:>7.0f}x'.format(prims, new, counts, old, old / new))
+        else:
+            print('{0:>10} {1:>9.3f}s {2:>9.3f}s {3:>10} {4:>8}'.format(prims, new, counts, '-', '-'))
+
+
+def BuildBenchmark(script, args):
+    print('\n{0:>10} {1:>10} {2:>7} {3:>10} {4:>10}'.format('type', 'materials', 'mode', 'hou calls', 'mock time'))
+    for mattype in script['MatType']:
+        for materials in args.builds:
+            for buildmode in script['BuildMode']:
+                seconds, count = TimeBuild(script, materials, mattype, buildmode)
+                print('{0:>10} {1:>10} {2:>7} {3:>10} {4:>9.3f}s'.format(mattype.name, materials, buildmode.name, count, seconds))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,127 @@
+# Startup benchmark for ProjectStarter, runs outside Houdini against a mocked hou module
+#
+# Opens the panel the way the shelf tool does (running ProjectStarter.py) and times the first open
+# and the following ones, with and without the session cache. Needs PySide2.
+#
+#   python benchProjectStarter.py [--opens 10] [--latency 5]
+#
+# --latency adds a delay in ms to every open() of the .ui and config file, to mimic the Z: share.
+
+import argparse
+import builtins
+import json
+import os
+import runpy
+import shutil
+import sys
+import tempfile
+import time
+import types
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PySide2 import QtCore, QtWidgets
+
+here = os.path.dirname(os.path.abspath(__file__))
+
+
+def MockHou():
+    hou = types.ModuleType('hou')
+    env = {}
+    hou.session = types.ModuleType('hou.session')
+    hou.fps = lambda: 25.0
+    hou.hscript = lambda cmd: ('', '')
+    hou.putenv = env.__setitem__
+    hou.getenv = lambda name, default=None: env.get(name, default)
+
+    def hscriptExpression(expr):
+        if expr.startswith('isvariable('):
+            return 1 if expr[len('isvariable('):-1] in env else 0
+        return env.get(expr.lstrip('$'), '')
+    hou.hscriptExpression = hscriptExpression
+    hou.ui = types.SimpleNamespace(mainQtWindow=lambda: None, displayMessage=lambda *a, **k: 0, setStatusMessage=lambda *a, **k: None)
+    hou.text = types.SimpleNamespace(expandString=os.path.expandvars)
+    loaded = set()
+    hou.hda = types.SimpleNamespace(reloadAllFiles=lambda: None, loadedFiles=lambda: sorted(loaded), reloadFile=lambda file: None,
+                                    installFile=lambda file, **kwargs: loaded.add(file),
+                                    uninstallFile=lambda file, **kwargs: loaded.discard(file))
+    return hou
+
+
+def MockTronoutils():
+    tronoutils = types.ModuleType('tronoutils')
+    tronoutils.main = types.SimpleNamespace(fixpath=lambda path, new_sep='/': path.replace('\\', new_sep).replace(' ', '_'))
+    return tronoutils
+
+
+def SetupFiles(folder):
+    uiFile = os.path.join(folder, 'ProjectStart.ui')
+    shutil.copy(os.path.join(here, 'ProjectStart.ui'), uiFile)
+    configFile = os.path.join(folder, 'FolderStructure.json')
+    with open(configFile, 'w') as f:
+        json.dump({'projectroot': folder, 'cachedir': folder + '/cache', 'assetdir': 'assets', 'hdadir': 'hda',
+                   'scriptdir': 'scripts', 'hdaglobaldir': folder + '/hda',
+                   'folders': ['/hip', '/hda', '/scripts', '/_Frames/0_RAW']}, f)
+    os.environ['PROJECTSTARTER_UI'] = uiFile
+    os.environ['PROJECTSTARTER_CONFIG'] = configFile
+    return uiFile, configFile
+
+
+def SlowShare(files, latency):
+    # Every open() of the share files waits, like a round trip to the file server
+    realOpen = builtins.open
+
+    def slowOpen(file, *args, **kwargs):
+        if file in files:
+            time.sleep(latency)
+        return realOpen(file, *args, **kwargs)
+    builtins.open = slowOpen
+
+
+def OpenPanel():
+    start = time.perf_counter()
+    win = runpy.run_path(os.path.join(here, 'ProjectStarter.py'))['win']
+    QtWidgets.QApplication.processEvents()
+    return time.perf_counter() - start, win
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time opening ProjectStarter with a mocked hou')
+    parser.add_argument('--opens', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.0, help='ms added to each read of the share files')
+    args = parser.parse_args(argv)
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    # The offscreen platform warns about raise() on every open
+    QtCore.qInstallMessageHandler(lambda *args: None)
+    hou = MockHou()
+    sys.modules['hou'] = hou
+    sys.modules['tronoutils'] = MockTronoutils()
+    folder = tempfile.mkdtemp()
+    home = os.environ.get('HOME')
+    os.environ['HOME'] = folder
+    try:
+        files = SetupFiles(folder)
+        if args.latency:
+            SlowShare(files, args.latency / 1000.0)
+
+        first, win = OpenPanel()
+        cached = [OpenPanel()[0] for i in range(args.opens)]
+        uncached = []
+        for i in range(args.opens):
+            # What every open cost before: a new window and both files read again
+            setattr(hou.session, '_projectStarterCache', None)
+            uncached.append(OpenPanel()[0])
+        win.close()
+    finally:
+        if home is not None:
+            os.environ['HOME'] = home
+        shutil.rmtree(folder, ignore_errors=True)
+
+    print('first open          {0:8.2f} ms'.format(first * 1000))
+    print('later opens         {0:8.2f} ms  (average of {1})'.format(sum(cached) / len(cached) * 1000, len(cached)))
+    print('later opens, no cache {0:6.2f} ms'.format(sum(uncached) / len(uncached) * 1000))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+# Benchmark for the PRB_MaterialLister folder scan, runs outside Houdini against a mocked hou module
+#
+# Builds a synthetic texture library (UDIM tiles of several texture sets per folder) and times
+# scan_texture_folder over it with different thread counts.
+#
+#   python benchTextureScan.py [--files 100000] [--folders 100] [--workers 1 4 16] [--latency 5]
+#
+# --latency adds a delay in ms to every folder listing, to mimic a network share.
+
+import argparse
+import contextlib
+import io
+import os
+import runpy
+import shutil
+import sys
+import tempfile
+import time
+import types
+
+here = os.path.dirname(os.path.abspath(__file__))
+TEXTURE_TYPES = ('BaseColor', 'Roughness', 'Metallic', 'Normal', 'Height')
+UDIMS = 20
+
+
+def MockHou():
+    # The script lists and builds at import. With no folder picked it stops right away
+    hou = types.ModuleType('hou')
+    hou.ui = types.SimpleNamespace(selectFile=lambda *a, **k: '', displayMessage=lambda *a, **k: None)
+    hou.fileType = types.SimpleNamespace(Directory='directory')
+    return hou
+
+
+def LoadMaterialLister():
+    sys.modules['hou'] = MockHou()
+    with contextlib.redirect_stdout(io.StringIO()):
+        return runpy.run_path(os.path.join(here, 'PRB_MaterialLister.py'))
+
+
+def MakeLibrary(root, files, folders):
+    # folders/asset###/ with files spread evenly, every set has all texture types and UDIM tiles
+    perSet = len(TEXTURE_TYPES) * UDIMS
+    sets = max(files // (perSet * folders), 1)
+    created = 0
+    for f in range(folders):
+        folder = os.path.join(root, 'assets', 'asset{0:03d}'.format(f))
+        os.makedirs(folder)
+        for s in range(sets):
+            for texture_type in TEXTURE_TYPES:
+                for udim in range(1001, 1001 + UDIMS):
+                    name = 'asset{0:03d}_part{1:02d}_{2}_ACES - ACEScg.{3}.exr'.format(f, s, texture_type, udim)
+                    open(os.path.join(folder, name), 'wb').close()
+                    created += 1
+    return created
+
+
+@contextlib.contextmanager
+def SlowShare(latency):
+    # Every folder listing waits, like a round trip to the file server
+    realScandir = os.scandir
+
+    def slowScandir(path='.'):
+        time.sleep(latency)
+        return realScandir(path)
+    os.scandir = slowScandir
+    try:
+        yield
+    finally:
+        os.scandir = realScandir
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time scan_texture_folder on a synthetic texture library')
+    parser.add_argument('--files', type=int, default=100000)
+    parser.add_argument('--folders', type=int, default=100)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--latency', type=float, default=0.0, help='ms added to each folder listing')
+    args = parser.parse_args(argv)
+
+    script = LoadMaterialLister()
+    root = tempfile.mkdtemp()
+    try:
+        start = time.perf_counter()
+        files = MakeLibrary(root, args.files, args.folders)
+        print('Created {0} files in {1} folders ({2:.1f}s)'.format(files, args.folders, time.perf_counter() - start))
+        with SlowShare(args.latency / 1000.0):
+            for workers in args.workers:
+                result = script['scan_texture_folder'](root, workers=workers)
+                assert result.matched == files
+                print('{0:>3} workers: {1}'.format(workers, result))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,15 +1,21 @@
-import hou
+import argparse
+import json
 import os
+import re
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import hou
+
+from collectUtils import AssetManifest, AssetSet, CopyAssets, FileFilter, FileSequence, InferSequence, NEVER_COPY, PROXY_PATTERNS, fileIndex
 
 """
 TODO:
 - UI and preferences
     - Set destination drive/folder
-- Grab cached sequences
-- Find File Caches and disable nodes above
-    - Store in array and restore to previous state after submission
 - Update paths to destination
-- Copy files
 - Create log file
 - Export job / submit to Deadline
 
@@ -18,121 +24,280 @@ DONE:
 - Expand variables to full paths
 - Filter duplicates
 - Filter out ROPs and unnecessary files 
+- File type filtering while collecting (settings[3]/[4]), proxies/ifds/previews are never evaluated per frame
+- Find File Caches and disable nodes above (settings[5], RestoreNodes puts them back)
+- Check files exist and sum up transfer size
+- Grab cached sequences (probe a few frames instead of evaluating every frame)
+- Copy files (threaded, skips up to date files, resumable journal)
+- Asset manifest with content hashes, only changed files are re-hashed
+- Streaming collection pipeline (StreamSceneAssets), frames are never held in a list
+- Command line/batch mode for many hip files:
+    hython collectFiles.py shot010.hip shot020.hip:1001-1100 --frames 560-600 --manifest /tmp/manifest.jsonl --dest /mnt/farm/job
 
 """
 
 frameRange = [560, 600]
-# SETTINGS: ignore bypassed sops, ignore proxies, ignore non-displayed, enable file filtering, filter extension list
-settings = [1,1,1,0,""]
+# SETTINGS: ignore bypassed sops, ignore proxies, ignore non-displayed (not used, the display flag test failed
+#           on assets with hidden objects), enable file filtering, filter extension list, disable nodes above file caches
+# Filter list: extensions and/or globs, ! to exclude, >/< for size limits. e.g. "bgeo.sc, vdb, abc, !*/old/*, >1KB"
+
+settings = [1,1,1,0,"",0]
+# Copy destination root. Files under $JOB keep their relative path, everything else goes to _misc. Empty = don't copy
+destination = ""
+
+# Parms that write files. References on these are outputs, not assets
+WRITE_PARMS = ('sopoutput', 'dopoutput', 'lopoutput', 'vm_picture', 'picture', 'RS_outputFileNamePrefix')
+# Time dependent variables in a file path: $F, $F4, ${F4}, $FF, $T, $SF, $ST. Not $FSTART, $FEND or $FPS
+FRAME_TOKEN = re.compile(r'\$(?:\{(?:F\d*|FF|SF|T|ST)\}|(?:F\d*|FF|SF|T|ST)(?![A-Za-z]))')
 
 
 toCopy = []
 toCopyMisc = [] # for non-HIP/JOB files to sort out
 
 
-
-def CollectSceneAssets(settings):
-    IGNORE_BYPASSED = settings[0]
-    IGNORE_PROXY = settings[1]
-    IGNORE_NONDISPLAY = settings[2]
-    FILTER_FILETYPES = settings[3]
-    FILETYPES = settings[4]
+class SceneReport(object):
+    # Result of CollectSceneAssets
     
-    SceneAssets = []
-
-    #Set to frame 0 and update to manual
-    hou.setUpdateMode(hou.updateMode.Manual)        
-    hou.setFrame(hou.playbar.playbackRange()[0])    
-    #hou.hipFile.save()
-    
-    #collect all file references
-    refs = hou.fileReferences():  
+    def __init__(self, assets):
+        self.assets = assets
+        self.references = {'rop': [], 'cache_read': [], 'cache_write': [], 'hda': [], 'file': []}
+        self.skipped = []       # (parm path, reason)
+        self.disabled = []      # node paths bypassed above file caches, see RestoreNodes
+        self.evaluations = 0    # parm evaluations, including reference lookups
     
-    # Find file caches and remove file references above in the same network   
-    # We'll end up looping through twice for this
+    def __str__(self):
+        counts = ', '.join('{0} {1}'.format(len(v), k) for k, v in self.references.items())
+        return '{0} assets from {1}. {2} skipped, {3} parm evaluations'.format(len(self.assets), counts, len(self.skipped), self.evaluations)
+
+
+def ResolveParm(parm, resolved, report):
+    # Follows channel references until the parm references itself.
+    # Every parm on the way is cached by path, so shared chains are only walked once
+    chain = []
+    while True:
+        path = parm.path()
+        if path in resolved:
+            parm = resolved[path]
+            break
+        chain.append(path)
+        ref = parm.getReferencedParm()
+        report.evaluations += 1
+        if ref.path() == path or ref.path() in chain:
+            break
+        parm = ref
+    for path in chain:
+        resolved[path] = parm
+    return parm
+
+
+def ClassifyReference(file_parm):
+    # Returns rop, cache_read, cache_write, hda or file
+    if file_parm is None:
+        # No parm means HDA definitions and the like
+        return 'hda'
+    node = file_parm.node()
+    if isinstance(node, hou.RopNode):
+        return 'rop'
+    #TWO FILES NODES EXISTS IN EACH FILE CACHE, the one in file_mode writes out
+    if file_parm.name() in WRITE_PARMS or "file_mode" in file_parm.path().split("/"):
+        return 'cache_write'
+    if isinstance(node, hou.SopNode) and file_parm.name() == "file":
+        if node.parm("f1") is not None and node.parm("f2") is not None:
+            return 'cache_read'
+    return 'file'
+
+
+def DisableUpstream(nodes, disabled=None):
+    # Bypasses all SOPs above the given file caches. Returns their paths for RestoreNodes.
+    # Paths are appended to disabled as nodes get bypassed, so it is complete even if this raises
+    if disabled is None:
+        disabled = []
+    seen = set()
+    for node in nodes:
+        for n in node.inputAncestors():
+            if n.path() in seen:
+                continue
+            seen.add(n.path())
+            if isinstance(n, hou.SopNode) and not n.isBypassed():
+                n.bypass(True)
+                disabled.append(n.path())
+    return disabled
+
+
+def RestoreNodes(paths):
+    # Undo DisableUpstream
+    for path in paths:
+        node = hou.node(path)
+        if node is not None:
+            node.bypass(False)
+
+
+def BuildFilter(settings):
+    # Filter used while collecting. Files we never copy are always excluded
+    exclude = list(NEVER_COPY)
+    if settings[1]:
+        exclude += PROXY_PATTERNS
+    if settings[3] and settings[4]:
+        return FileFilter.fromString(settings[4], exclude=exclude)
+    return FileFilter(exclude=exclude)
+
+
+# --------------------------------------------------------------------------
+# Collection pipeline
+# references -> resolve -> classify -> (skip upstream) -> expand frames -> filter -> dedup -> sink
+# Every stage is a generator, so frames are never held in a list. Only the dedup stage remembers files.
+# --------------------------------------------------------------------------
+
+def IterReferences(report):
+    for file_parm, file in hou.fileReferences():
+        if file_parm is None:
+            # No parm means HDA definitions and the like
+            report.references['hda'].append((None, file))
+            continue
+        yield file_parm, file
+
+
+def ResolveReferences(refs, report):
+    # Finding and ignoring referenced SOPs. Several parms can point to the same one, only yield it once
+    resolved = {}
+    seen = set()
     for file_parm, file in refs:
-        #IF file parameter is None, it's an HDA or something we shouldn't need to include
-        if file_parm is None: 
-            continue;
-        if isinstance(file_parm.node(), hou.SopNode):
-            if file_parm.name() == "file":
-                p = file_parm.path().split("/")
-                #SKIP IF WRITE OUT NODE - TWO FILES NODES EXISTS IN EACH FILE CACHE
-                if "file_mode" in p:
-                    continue;
-                if file_parm
-        
+        file_parm = ResolveParm(file_parm, resolved, report)
+        if file_parm.path() in seen:
+            continue
+        seen.add(file_parm.path())
+        yield file_parm, file
+
+
+def ClassifyReferences(parms, settings, report):
+    IGNORE_BYPASSED = settings[0]
     
-    string = "----\n\n"
-    for file_parm, file in refs:
-        #IF file parameter is None, it's an HDA or something we do not need to include
-        if file_parm is None: 
-            continue;
-        
-        #Remove ROP file references
-        if type(file_parm.node()) == hou.RopNode:        
-            continue;
+    for file_parm, file in parms:
+        kind = ClassifyReference(file_parm)
+        report.references[kind].append((file_parm.path(), file))
         
-        # Finding and ignoring referenced SOPs and not displayed
-        # Hacky way, iterate 10 times; Returns the referenced parameter. If no parameter is referenced, returns this parameter.
-        for i in xrange(10): 
-            file_parm = file_parm.getReferencedParm()
+        #Remove ROP and write out references
+        if kind in ('rop', 'cache_write'):
+            continue
             
         # Check and skip if node is disabled
         if IGNORE_BYPASSED and file_parm.isDisabled():
-            continue;
+            report.skipped.append((file_parm.path(), 'disabled'))
+            continue
         #Check if bypassed
         if IGNORE_BYPASSED and file_parm.node().isGenericFlagSet(hou.nodeFlag.Bypass):
-            continue;
-            
-        # Testing for display flag. 
-        # DOES NOT WORK because of assets objs are hidden
-        """
-        disp = True
-        if isinstance(file_parm.node(), hou.SopNode):
-            top = getObjParent(file_parm.node())
-            if top:
-                disp = top.isGenericFlagSet(hou.nodeFlag.Display)
-        if IGNORE_NONDISPLAY and not disp:
-            continue;
-        """
-        
+            report.skipped.append((file_parm.path(), 'bypassed'))
+            continue
+        yield kind, file_parm
+
+
+def SkipUpstream(items, report):
+    # Files above file caches are not needed, the cache has them baked.
+    # Has to see all references before passing any on, but these are parms, not files
+    found = list(items)
+    cachenodes = [file_parm.node() for kind, file_parm in found if kind == 'cache_read']
+    DisableUpstream(cachenodes, report.disabled)
+    upstream = set(report.disabled)
+    for kind, file_parm in found:
+        if file_parm.node().path() in upstream:
+            report.skipped.append((file_parm.path(), 'above file cache'))
+            continue
+        yield kind, file_parm
+
+
+def ExpandFrames(items, frames, fileFilter, report):
+    # Yields (file, parm path, (start, end) or None)
+    for kind, file_parm in items:
         # GET FILE CACHE SOPS AND FILE RANGES
-        if isinstance(file_parm.node(), hou.SopNode):
-            if file_parm.name() == "file":
-                p = file_parm.path().split("/")
-                #SKIP IF WRITE OUT NODE - TWO FILES NODES EXISTS IN EACH FILE CACHE
-                if "file_mode" in p:
-                    continue;
-                startFr = file_parm.node().parm("f1").eval()
-                endFr = file_parm.node().parm("f2").eval()
-                # Adjust frame ranges from which is smallest. Render or file cache range.
-                if frameRange[0] > startFr:
-                    startFr = frameRange[0]
-                if frameRange[1] < endFr:
-                    endFr = frameRange[1]
-                files = CollectFrameRange(file_parm, startFr, endFr)
-                for file in files:
-                    SceneAssets.append(file)
-                    continue;
-        
+        if kind == 'cache_read':
+            node = file_parm.node()
+            startFr = node.parm("f1").eval()
+            endFr = node.parm("f2").eval()
+            report.evaluations += 2
+            # Adjust frame ranges from which is smallest. Render or file cache range.
+            if frames[0] > startFr:
+                startFr = frames[0]
+            if frames[1] < endFr:
+                endFr = frames[1]
+            # Check the first frame against the filter before expanding the whole range
+            report.evaluations += 1
+            if not fileFilter.matchPath(file_parm.evalAtFrame(int(startFr))):
+                report.skipped.append((file_parm.path(), 'filtered'))
+                continue
+            files = CollectFrameRange(file_parm, startFr, endFr)
+            if isinstance(files, FileSequence):
+                report.evaluations += 3
+                seq = (files.start, files.end)
+            else:
+                report.evaluations += int(endFr) - int(startFr) + 1
+                seq = None
+            for file in files:
+                yield file, file_parm.path(), seq
+            continue
         
         #Evaluate variables and expressions to the complete path
         expandedFile = file_parm.eval()
-            
-        #string += str(file_parm)
-        #string += " :: " + expandedFile + "\n"
-        
-        SceneAssets.append(expandedFile)
-        
+        report.evaluations += 1
+        yield expandedFile, file_parm.path(), None
+
+
+def FilterFiles(records, fileFilter):
+    # Path filter plus size limits. Sizes come from the shared file index
+    return fileFilter.filter(records, fileIndex, key=lambda record: record[0])
+
+
+def DedupFiles(records, assets, progress=None):
+    # Adds to the AssetSet and only passes on files that were not seen before
+    for file, parm, seq in records:
+        if assets.add(file, parm, seq):
+            if progress is not None:
+                progress(len(assets))
+            yield file, parm, seq
+
+
+def StreamSceneAssets(settings, frames=None, report=None, progress=None):
+    # Returns the pipeline as a generator of unique (file, parm path, frames) records.
+    # Consume it into whatever sink is needed, report.assets holds everything seen so far
+    if frames is None:
+        frames = frameRange
+    if report is None:
+        report = NewSceneReport()
+    DISABLE_UPSTREAM = settings[5] if len(settings) > 5 else 0
+    fileFilter = BuildFilter(settings)
     
-    #Filter list and delete duplicates
-    FilteredAssets = []
-    for i in SceneAssets:
-        if i not in FilteredAssets:
-            FilteredAssets.append(i)
+    stream = IterReferences(report)
+    stream = ResolveReferences(stream, report)
+    stream = ClassifyReferences(stream, settings, report)
+    if DISABLE_UPSTREAM:
+        stream = SkipUpstream(stream, report)
+    stream = ExpandFrames(stream, frames, fileFilter, report)
+    stream = FilterFiles(stream, fileFilter)
+    return DedupFiles(stream, report.assets, progress)
+
+
+def NewSceneReport():
+    # Deduplicates on the real path and keeps track of which parms use each file
+    return SceneReport(AssetSet({'HIP': hou.getenv('HIP'), 'JOB': hou.getenv('JOB')}))
+
+
+def CollectSceneAssets(settings, frames=None, progress=None, sink=None, report=None):
+    # frames: [start, end] to limit file caches to, defaults to frameRange
+    # progress: optional callable(number of unique files so far)
+    # sink: optional callable(file, parm path, frames) for every unique file, e.g. to feed a copy queue
+    # report: optional SceneReport to fill in, lets the caller restore bypassed nodes if collecting fails
+    if report is None:
+        report = NewSceneReport()
+
+    #Set to frame 0 and update to manual
+    hou.setUpdateMode(hou.updateMode.Manual)        
+    hou.setFrame(hou.playbar.playbackRange()[0])    
+    #hou.hipFile.save()
+    
+    for record in StreamSceneAssets(settings, frames, report, progress):
+        if sink is not None:
+            sink(*record)
     
-    return FilteredAssets
+    return report
 
 def getObjParent(node):
     if isinstance(node, hou.ObjNode):
@@ -143,19 +308,222 @@ def getObjParent(node):
     return getObjParent(parent)
     
 
-def CollectFrameRange(fileparm, startFr, endFr):
-    files = []
-    for i in range(int(startFr), int(endFr)):
-        filename = fileparm.evalAtFrame(i)
-        files.append(filename)
-        
-    return files
+def DestinationPath(path, destRoot):
+    job = hou.getenv('JOB')
+    if job:
+        job = job.replace('\\', '/').rstrip('/') + '/'
+        if path.replace('\\', '/').startswith(job):
+            return os.path.join(destRoot, path[len(job):])
+    # Not part of the project, keep the full path below _misc.
+    # The drive becomes a plain folder name: C: -> C, //server/share -> server_share. Joining the drive
+    # as it is would make a UNC path absolute again and point back at the source
+    drive, rest = os.path.splitdrive(path)
+    drive = drive.replace('\\', '/').strip('/:').replace('/', '_')
+    return os.path.join(destRoot, '_misc', drive, rest.lstrip('/\\'))
+
+
+def CheckSceneAssets(assets):
+    # Finds missing files and the total transfer size. Directory listings are cached for the session
+    report = fileIndex.check(assets)
+    if report.missing:
+        missing = set(report.missing)
+        print('MISSING FILES:')
+        for path, parms in assets.items():
+            if os.path.normpath(path) in missing:
+                print('    ' + path + '  (' + ', '.join(parms) + ')')
+    for dir in sorted(report.directories):
+        count, size = report.directories[dir]
+        print('{0:>8} files {1:>10.1f} MB  {2}'.format(count, size / (1024.0 * 1024.0), dir))
+    print(str(report))
+    return report
+
+
+def WriteManifest(assets, destRoot):
+    # Manifest lives next to the copied files so a resubmit can see what changed since last time
+    manifest = AssetManifest(os.path.join(destRoot, 'collect_manifest.jsonl'))
+    changed = manifest.update(assets)
+    manifest.save()
+    print('Manifest: {0} files, {1} new or changed, hashed in {2:.2f}s'.format(len(manifest.entries), len(changed), manifest.seconds))
+    return manifest
+
+
+def CopySceneAssets(assets, destRoot):
+    pairs = [(asset, DestinationPath(asset, destRoot)) for asset in assets]
+    journal = os.path.join(destRoot, 'collect_journal.jsonl')
+    report = CopyAssets(pairs, journal)
+    for src, error in report.failed:
+        print('FAILED: ' + src + ' - ' + error)
+    print(str(report))
+    return report
     
+
+def CollectFrameRange(fileparm, startFr, endFr, step=1):
+    # Returns the files for frames startFr-endFr (inclusive) as an iterable.
+    # Simple $F paths are evaluated at a few probe frames and returned as a lazy FileSequence,
+    # only expressions fall back to evaluating every frame
+    startFr = int(startFr)
+    endFr = int(endFr)
     
-AssetsToCopy = CollectSceneAssets(settings)
-print "\n\nASSETS TO COPY:\n\n"
-for asset in AssetsToCopy:
-    print asset
+    try:
+        raw = fileparm.unexpandedString()
+    except hou.OperationFailed:
+        # Keyframed or expression parm
+        raw = None
+    
+    if raw is not None and '`' not in raw:
+        if FRAME_TOKEN.search(raw) is None:
+            return [fileparm.evalAtFrame(startFr)]
+        probes = sorted(set([startFr, (startFr + endFr) // 2, endFr]))
+        sequence = InferSequence(dict((i, fileparm.evalAtFrame(i)) for i in probes), startFr, endFr, step)
+        if sequence is not None:
+            return sequence
+    
+    # Generator, frames are evaluated as they are consumed
+    return (fileparm.evalAtFrame(i) for i in range(startFr, endFr + 1, step))
+    
+    
+def RunCollect(settings, destination, frames=None):
+    # Collect the open scene, check files and copy them if a destination is set
+    report = NewSceneReport()
+    try:
+        with hou.InterruptableOperation('Collecting scene files', open_interrupt_dialog=True) as operation:
+            def progress(count):
+                if count % 100 == 0:
+                    operation.updateLongProgress(-1.0, '{0} files'.format(count))
+            CollectSceneAssets(settings, frames, progress, report=report)
+        AssetsToCopy = report.assets
+        print("\n\nASSETS TO COPY:\n\n")
+        for asset in AssetsToCopy:
+            print(asset)
+
+        print(str(report))
+        CheckSceneAssets(AssetsToCopy)
+
+        if destination:
+            WriteManifest(AssetsToCopy, destination)
+            CopySceneAssets(AssetsToCopy, destination)
+    finally:
+        # Also when cancelled or failed, bypassed nodes must not end up saved in the hip file
+        RestoreNodes(report.disabled)
+    return report
+
+
+# --------------------------------------------------------------------------
+# Command line / batch
+# --------------------------------------------------------------------------
+
+def ParseFrames(text):
+    # "560-600" -> [560, 600]
+    start, end = text.split('-', 1)
+    return [int(start), int(end)]
+
+
+def ParseHipArg(text):
+    # "shot.hip" or "shot.hip:1001-1100". Careful with windows drive letters
+    head, sep, tail = text.rpartition(':')
+    if sep and tail and tail[0].isdigit() and '-' in tail:
+        return head, ParseFrames(tail)
+    return text, None
 
 
+def SettingsFromArgs(args):
+    return [
+        0 if args.include_bypassed else 1,
+        1,
+        1,
+        1 if args.filter_types else 0,
+        args.filter_types or "",
+        1 if args.disable_upstream else 0,
+    ]
+
+
+def CollectHipFile(hipfile, settings, frames, output):
+    # Worker mode: load one hip file, collect and write the assets to output as json
+    hou.hipFile.load(hipfile, suppress_save_prompt=True, ignore_load_warnings=True)
+    report = CollectSceneAssets(settings, frames)
+    hipname = os.path.basename(hipfile)
+    result = {
+        'hip': hipfile,
+        'summary': str(report),
+        'assets': [[path, [hipname + ':' + p for p in parms], seq] for path, parms, seq in report.assets.entries()],
+    }
+    with open(output, 'w') as f:
+        json.dump(result, f)
+
+
+def RunWorker(hython, hipfile, args, frames):
+    # Runs one hython process per hip file and reads back its json
+    handle, output = tempfile.mkstemp(suffix='.json', prefix='collect_')
+    os.close(handle)
+    cmd = [hython, os.path.abspath(__file__), '--worker', hipfile, '--json', output,
+           '--frames', '{0}-{1}'.format(frames[0], frames[1])]
+    if args.include_bypassed:
+        cmd.append('--include-bypassed')
+    if args.disable_upstream:
+        cmd.append('--disable-upstream')
+    if args.filter_types:
+        cmd += ['--filter-types', args.filter_types]
+    try:
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+        if proc.returncode != 0:
+            return {'hip': hipfile, 'error': proc.stdout}
+        with open(output, 'r') as f:
+            return json.load(f)
+    finally:
+        os.remove(output)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Collect (and copy) the files used by hip files. Run with hython.')
+    parser.add_argument('hipfiles', nargs='+', help='hip files, optionally with their own range: shot.hip:1001-1100')
+    parser.add_argument('--frames', default='{0}-{1}'.format(*frameRange), help='frame range for file caches, default %(default)s')
+    parser.add_argument('--include-bypassed', action='store_true', help='also collect files on bypassed/disabled nodes')
+    parser.add_argument('--disable-upstream', action='store_true', help='skip files on nodes above file caches')
+    parser.add_argument('--filter-types', default='', help='comma separated extensions/globs to collect, ! to exclude, >1KB/<10GB size limits')
+    parser.add_argument('--manifest', help='merged manifest to write (json lines)')
+    parser.add_argument('--dest', help='copy all collected files below this folder')
+    parser.add_argument('--workers', type=int, default=max((os.cpu_count() or 2) // 2, 1), help='parallel hython processes')
+    parser.add_argument('--hython', default=sys.executable, help='hython executable for the workers')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--json', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
     
+    defaultFrames = ParseFrames(args.frames)
+    settings = SettingsFromArgs(args)
+    
+    if args.worker:
+        CollectHipFile(args.hipfiles[0], settings, defaultFrames, args.json)
+        return 0
+    
+    jobs = [ParseHipArg(h) for h in args.hipfiles]
+    assets = AssetSet()
+    failed = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(RunWorker, args.hython, hipfile, args, frames or defaultFrames) for hipfile, frames in jobs]
+        for future in futures:
+            result = future.result()
+            if 'error' in result:
+                failed += 1
+                print('FAILED: ' + result['hip'] + '\n' + result['error'])
+                continue
+            print(result['hip'] + ': ' + result['summary'])
+            for path, parms, frames in result['assets']:
+                assets.add(path, None, frames)
+                for parm in parms:
+                    assets.add(path, parm)
+    
+    print('{0} unique files from {1} hip files'.format(len(assets), len(jobs) - failed))
+    if args.manifest:
+        manifest = AssetManifest(args.manifest)
+        changed = manifest.update(assets)
+        manifest.save()
+        print('Manifest: {0} files, {1} new or changed, {2} missing'.format(len(manifest.entries), len(changed), len(manifest.missing)))
+    if args.dest:
+        CopySceneAssets(assets, args.dest)
+    return 1 if failed else 0
+
+
+if hou.isUIAvailable():
+    RunCollect(settings, destination)
+elif __name__ == '__main__':
+    sys.exit(main())
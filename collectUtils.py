@@ -0,0 +1,765 @@
+######################################################
+##
+##  Helpers for collectFiles
+##  Trond Hille 2024
+##
+##  Everything in here is plain python without hou, so it can run on the farm/outside Houdini
+##  and be tried out against temporary directories.
+##
+#####################################################
+
+import fnmatch
+import hashlib
+import json
+import mmap
+import os
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# Files with these extensions (or bigger than FASTCOPY_MINSIZE) are copied kernel side
+FASTCOPY_EXTENSIONS = ('.bgeo.sc', '.bgeo', '.vdb', '.abc', '.usd', '.usdc')
+FASTCOPY_MINSIZE = 16 * 1024 * 1024
+COPY_WORKERS = 8
+HASH_CHUNK = 8 * 1024 * 1024
+HASH_WORKERS = max((os.cpu_count() or 2) - 1, 1)
+# Allowed mtime difference when comparing source and destination. SMB/FAT shares round mtimes
+MTIME_TOLERANCE = 2.0
+
+
+# --------------------------------------------------------------------------
+# Copying
+# --------------------------------------------------------------------------
+
+class CopyJournal(object):
+    # Append only log of finished copies. Lets an interrupted transfer continue where it stopped.
+    # One json line per file: src, dst, size, mtime of the source when it was copied
+
+    def __init__(self, path):
+        self.path = path
+        self.done = {}
+        self._lock = threading.Lock()
+        self._file = None
+        self.load()
+
+    def load(self):
+        if not os.path.isfile(self.path):
+            return
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Last line can be cut off if the process was killed mid write
+                    continue
+                self.done[entry['dst']] = (entry['size'], entry['mtime'])
+
+    def isDone(self, dst, size, mtime):
+        entry = self.done.get(dst)
+        return entry is not None and entry[0] == size and abs(entry[1] - mtime) < MTIME_TOLERANCE
+
+    def add(self, src, dst, size, mtime):
+        line = json.dumps({'src': src, 'dst': dst, 'size': size, 'mtime': mtime}) + '\n'
+        with self._lock:
+            if self._file is None:
+                dir = os.path.dirname(os.path.abspath(self.path))
+                if not os.path.isdir(dir):
+                    os.makedirs(dir)
+                self._file = open(self.path, 'a')
+            self._file.write(line)
+            self._file.flush()
+            self.done[dst] = (size, mtime)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def clear(self):
+        # Transfer finished, the next run checks the destination again
+        self.close()
+        self.done = {}
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class CopyReport(object):
+
+    def __init__(self):
+        self.copied = 0
+        self.skipped = 0
+        self.failed = []
+        self.bytes = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, result, size=0, error=None):
+        with self._lock:
+            if result == 'copied':
+                self.copied += 1
+                self.bytes += size
+            elif result == 'skipped':
+                self.skipped += 1
+            else:
+                self.failed.append(error)
+
+    def mbPerSecond(self):
+        if self.seconds <= 0:
+            return 0.0
+        return self.bytes / (1024.0 * 1024.0) / self.seconds
+
+    def filesPerSecond(self):
+        if self.seconds <= 0:
+            return 0.0
+        return (self.copied + self.skipped) / self.seconds
+
+    def __str__(self):
+        return 'Copied {0} files ({1:.1f} MB), skipped {2}, failed {3} in {4:.2f}s - {5:.1f} MB/s, {6:.1f} files/s'.format(
+            self.copied, self.bytes / (1024.0 * 1024.0), self.skipped, len(self.failed), self.seconds,
+            self.mbPerSecond(), self.filesPerSecond())
+
+
+def IsUpToDate(srcstat, dst):
+    # Destination counts as up to date if size and mtime match the source
+    try:
+        dststat = os.stat(dst)
+    except OSError:
+        return False
+    return dststat.st_size == srcstat.st_size and abs(dststat.st_mtime - srcstat.st_mtime) < MTIME_TOLERANCE
+
+
+def FastCopy(src, dst, size):
+    # Copy without pulling the data through python. copy_file_range stays inside the kernel
+    # (and can be server side on NFS/SMB), sendfile is the fallback for older kernels/pythons
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        infd = fsrc.fileno()
+        outfd = fdst.fileno()
+        offset = 0
+        if hasattr(os, 'copy_file_range'):
+            try:
+                while offset < size:
+                    sent = os.copy_file_range(infd, outfd, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+                return
+            except OSError:
+                # Cross device on older kernels etc, try sendfile from where we got to
+                pass
+        if hasattr(os, 'sendfile'):
+            try:
+                while offset < size:
+                    sent = os.sendfile(outfd, infd, offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+                return
+            except OSError:
+                pass
+        fsrc.seek(offset)
+        fdst.seek(offset)
+        shutil.copyfileobj(fsrc, fdst, 1024 * 1024)
+
+
+def CopyFile(src, dst, srcstat=None):
+    # Copies a single file to a .part file and renames it when done, so a half copied file
+    # never looks finished. Keeps the source mtime so the next run can skip it
+    if srcstat is None:
+        srcstat = os.stat(src)
+    dir = os.path.dirname(dst)
+    if dir and not os.path.isdir(dir):
+        try:
+            os.makedirs(dir)
+        except OSError:
+            # Another worker created it first
+            if not os.path.isdir(dir):
+                raise
+
+    temp = dst + '.part'
+    if src.lower().endswith(FASTCOPY_EXTENSIONS) or srcstat.st_size >= FASTCOPY_MINSIZE:
+        FastCopy(src, temp, srcstat.st_size)
+    else:
+        shutil.copyfile(src, temp)
+    os.utime(temp, (srcstat.st_atime, srcstat.st_mtime))
+    os.replace(temp, dst)
+
+
+def CopyAssets(pairs, journalFile=None, workers=COPY_WORKERS, progress=None):
+    # Copies (source, destination) pairs on a thread pool.
+    # Files whose destination already has the same size and mtime are skipped.
+    # journalFile: optional path of a resumable journal. Files in the journal are skipped without
+    #              touching the destination, which is usually on a slow share. The journal is removed
+    #              when every file made it, so it only resumes interrupted or partly failed transfers.
+    # progress: optional callable(done, total). total is None when pairs is a generator
+    # pairs can be a generator (e.g. straight from the collection pipeline), it is consumed as workers free up
+    report = CopyReport()
+    journal = CopyJournal(journalFile) if journalFile else None
+    total = len(pairs) if hasattr(pairs, '__len__') else None
+    counter = [0]
+    lock = threading.Lock()
+
+    def copyOne(pair):
+        src, dst = pair
+        try:
+            srcstat = os.stat(src)
+            if journal is not None and journal.isDone(dst, srcstat.st_size, srcstat.st_mtime):
+                report.add('skipped')
+            elif IsUpToDate(srcstat, dst):
+                report.add('skipped')
+                if journal is not None:
+                    journal.add(src, dst, srcstat.st_size, srcstat.st_mtime)
+            else:
+                CopyFile(src, dst, srcstat)
+                report.add('copied', srcstat.st_size)
+                if journal is not None:
+                    journal.add(src, dst, srcstat.st_size, srcstat.st_mtime)
+        except (IOError, OSError) as e:
+            report.add('failed', error=(src, str(e)))
+
+        if progress is not None:
+            with lock:
+                counter[0] += 1
+                done = counter[0]
+            progress(done, total)
+
+    start = time.time()
+    finished = False
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Keep a bounded number of copies queued instead of submitting everything at once
+            pending = set()
+            for pair in pairs:
+                if len(pending) >= workers * 4:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                pending.add(pool.submit(copyOne, pair))
+            for future in pending:
+                future.result()
+        finished = True
+    finally:
+        report.seconds = time.time() - start
+        if journal is not None:
+            if finished and not report.failed:
+                journal.clear()
+            else:
+                journal.close()
+
+    return report
+
+
+# --------------------------------------------------------------------------
+# Asset set
+# --------------------------------------------------------------------------
+
+class AssetSet(object):
+    # Insertion ordered set of file paths, keyed on the normalized real path.
+    # Handles $HIP/$JOB style variables, mixed separators, case (on Windows) and symlinks,
+    # and remembers which parms referenced each file.
+
+    def __init__(self, variables=None, resolveLinks=True, ignoreCase=None):
+        # variables: dict used to expand $VAR/${VAR}, defaults to os.environ
+        self.variables = variables
+        # Longest names first so $HIPNAME is not replaced as $HIP
+        self._varnames = sorted(variables or {}, key=len, reverse=True)
+        self.resolveLinks = resolveLinks
+        self.ignoreCase = (os.name == 'nt') if ignoreCase is None else ignoreCase
+        self._assets = {}
+        self._realdirs = {}
+
+    def expand(self, path):
+        if '$' not in path:
+            return path
+        if self.variables is None:
+            return os.path.expandvars(path)
+        for name in self._varnames:
+            value = self.variables[name]
+            if value is None:
+                continue
+            path = path.replace('${' + name + '}', value).replace('$' + name, value)
+        return path
+
+    def normalize(self, path):
+        path = self.expand(path).replace('\\', '/')
+        path = os.path.normpath(path)
+        if self.resolveLinks:
+            # realpath stats every path component, so resolve each directory only once
+            dir, name = os.path.split(path)
+            realdir = self._realdirs.get(dir)
+            if realdir is None:
+                realdir = os.path.realpath(dir)
+                self._realdirs[dir] = realdir
+            path = os.path.join(realdir, name)
+        path = path.replace('\\', '/')
+        if self.ignoreCase:
+            path = path.lower()
+        return path
+
+    def add(self, path, parm=None, frames=None):
+        # Returns True if the file was not in the set yet
+        # frames: (start, end) of the sequence the file belongs to
+        key = self.normalize(path)
+        entry = self._assets.get(key)
+        isnew = entry is None
+        if isnew:
+            entry = [self.expand(path).replace('\\', '/'), [], frames]
+            self._assets[key] = entry
+        if parm is not None and parm not in entry[1]:
+            entry[1].append(parm)
+        return isnew
+
+    def update(self, paths, parm=None, frames=None):
+        if frames is None and isinstance(paths, FileSequence):
+            frames = (paths.start, paths.end)
+        for path in paths:
+            self.add(path, parm, frames)
+
+    def references(self, path):
+        entry = self._assets.get(self.normalize(path))
+        return list(entry[1]) if entry else []
+
+    def items(self):
+        # (path, [referencing parms]) in the order they were first added
+        for path, parms, frames in self._assets.values():
+            yield path, parms
+
+    def entries(self):
+        # (path, [referencing parms], (start, end) or None)
+        for path, parms, frames in self._assets.values():
+            yield path, parms, frames
+
+    def __contains__(self, path):
+        return self.normalize(path) in self._assets
+
+    def __len__(self):
+        return len(self._assets)
+
+    def __iter__(self):
+        for entry in self._assets.values():
+            yield entry[0]
+
+
+# --------------------------------------------------------------------------
+# File sequences
+# --------------------------------------------------------------------------
+
+class FileSequence(object):
+    # Compact, lazily iterated frame sequence like /cache/sim.$F4.bgeo.sc for frames start-end (inclusive)
+    # pattern: path with one $F or $F<padding> token
+
+    def __init__(self, pattern, start, end, step=1, padding=None):
+        index = pattern.rfind('$F')
+        if index < 0:
+            raise ValueError('No $F token in ' + pattern)
+        digits = index + 2
+        while digits < len(pattern) and pattern[digits].isdigit():
+            digits += 1
+        self.prefix = pattern[:index]
+        self.suffix = pattern[digits:]
+        if padding is None:
+            padding = int(pattern[index + 2:digits] or 0)
+        self.padding = padding
+        self.start = int(start)
+        self.end = int(end)
+        self.step = max(int(step), 1)
+
+    @property
+    def pattern(self):
+        token = '$F' + str(self.padding) if self.padding > 1 else '$F'
+        return self.prefix + token + self.suffix
+
+    def frames(self):
+        return range(self.start, self.end + 1, self.step)
+
+    def path(self, frame):
+        return '{0}{1:0{2}d}{3}'.format(self.prefix, int(frame), self.padding, self.suffix)
+
+    def __iter__(self):
+        for frame in self.frames():
+            yield self.path(frame)
+
+    def __len__(self):
+        return len(self.frames())
+
+    def __repr__(self):
+        return 'FileSequence({0!r}, {1}, {2}, step={3})'.format(self.pattern, self.start, self.end, self.step)
+
+
+def InferSequence(probes, start, end, step=1):
+    # probes: {frame: evaluated path} for two or three frames.
+    # Finds the frame number in the paths and returns a FileSequence, or None if the paths
+    # differ in some other way than a plain (optionally zero padded) frame number
+    frames = sorted(probes)
+    if len(frames) < 2:
+        return None
+    paths = [probes[f] for f in frames]
+
+    # Common prefix/suffix of all probes, then widen so the whole number is in between
+    first = paths[0]
+    prefixlen = len(os.path.commonprefix(paths))
+    suffixlen = len(os.path.commonprefix([p[::-1] for p in paths]))
+    suffixlen = min(suffixlen, min(len(p) for p in paths) - prefixlen)
+    while prefixlen > 0 and first[prefixlen - 1].isdigit():
+        prefixlen -= 1
+    while suffixlen > 0 and first[len(first) - suffixlen].isdigit():
+        suffixlen -= 1
+    prefix = first[:prefixlen]
+    suffix = first[len(first) - suffixlen:] if suffixlen else ''
+
+    padding = 0
+    for frame, path in zip(frames, paths):
+        number = path[prefixlen:len(path) - suffixlen]
+        if not number.isdigit() or int(number) != frame:
+            return None
+        if len(number) > len(str(frame)):
+            # Zero padded, all probes have to agree on the width
+            if padding and padding != len(number):
+                return None
+            padding = len(number)
+    if padding:
+        for frame, path in zip(frames, paths):
+            if len(path) - suffixlen - prefixlen != max(padding, len(str(frame))):
+                return None
+
+    return FileSequence(prefix + '$F' + suffix, start, end, step, padding)
+
+
+# --------------------------------------------------------------------------
+# Filtering
+# --------------------------------------------------------------------------
+
+# Never worth copying: render scene descriptions and preview renders
+NEVER_COPY = ('*.ifd', '*.ifd.gz', '*.ifd.sc', '*/preview/*', '*/previews/*', '*/flipbook/*', '*/flipbooks/*')
+PROXY_PATTERNS = ('*/proxy/*', '*/proxies/*', '*_proxy.*', '*.proxy.*', '*_prx.*')
+# Size limit in a filter string: >10MB (at least), <1KB (at most). Units are powers of 1024
+SIZE_TOKEN = re.compile(r'^([<>])(\d+(?:\.\d+)?)([KMGT]?)B?$', re.IGNORECASE)
+SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+class FileFilter(object):
+    # Include/exclude globs, extension sets and size limits compiled once, so they are cheap enough
+    # to run on every reference while collecting.
+    # Globs match the whole path (case insensitive, / separators). Extensions are given without dot and
+    # can have several parts (bgeo.sc).
+
+    def __init__(self, include=(), exclude=(), extensions=(), excludeExtensions=(), minSize=None, maxSize=None):
+        self._include = self._compile(include)
+        self._exclude = self._compile(exclude)
+        self.extensions = frozenset(e.lower().lstrip('.') for e in extensions)
+        self.excludeExtensions = frozenset(e.lower().lstrip('.') for e in excludeExtensions)
+        self.minSize = minSize
+        self.maxSize = maxSize
+
+    @staticmethod
+    def _compile(patterns):
+        if not patterns:
+            return None
+        return re.compile('|'.join('(?:' + fnmatch.translate(p.lower().replace('\\', '/')) + ')' for p in patterns))
+
+    @classmethod
+    def fromString(cls, text, **kwargs):
+        # "bgeo.sc, vdb, !jpg, */cache/*, !*_v001*, >1KB, <10GB" -> extensions, excluded extensions,
+        # include and exclude globs, minimum and maximum size
+        include, exclude, extensions, excludeExtensions = [], [], [], []
+        for item in re.split(r'[,;\s]+', text.strip()):
+            if not item:
+                continue
+            size = SIZE_TOKEN.match(item)
+            if size:
+                limit, value, unit = size.groups()
+                kwargs['minSize' if limit == '>' else 'maxSize'] = int(float(value) * SIZE_UNITS[unit.upper()])
+                continue
+            negate = item.startswith('!')
+            item = item.lstrip('!')
+            isglob = any(c in item for c in '*?[/')
+            if isglob:
+                (exclude if negate else include).append(item)
+            else:
+                (excludeExtensions if negate else extensions).append(item)
+        return cls(include + list(kwargs.pop('include', ())), exclude + list(kwargs.pop('exclude', ())),
+                   extensions, excludeExtensions, **kwargs)
+
+    @property
+    def checksSize(self):
+        return self.minSize is not None or self.maxSize is not None
+
+    def _extensions(self, name):
+        # All possible extensions of a file name: a.b.bgeo.sc -> sc, bgeo.sc, b.bgeo.sc
+        parts = name.split('.')[1:]
+        return ['.'.join(parts[i:]) for i in range(len(parts))]
+
+    def matchPath(self, path):
+        path = path.replace('\\', '/').lower()
+        if self.extensions or self.excludeExtensions:
+            exts = self._extensions(path.rsplit('/', 1)[-1])
+            if self.excludeExtensions and any(e in self.excludeExtensions for e in exts):
+                return False
+            if self.extensions and not any(e in self.extensions for e in exts):
+                return False
+        if self._exclude is not None and self._exclude.match(path):
+            return False
+        if self._include is not None and not self._include.match(path):
+            return False
+        return True
+
+    def matchSize(self, size):
+        if size is None:
+            # Missing files are reported by the index, keep them
+            return True
+        if self.minSize is not None and size < self.minSize:
+            return False
+        if self.maxSize is not None and size > self.maxSize:
+            return False
+        return True
+
+    def filter(self, items, index=None, key=None):
+        # Lazily filters paths (or items, with key returning the path). Sizes come from a FileIndex
+        # (one scandir per directory)
+        refreshed = set()
+        for item in items:
+            path = key(item) if key is not None else item
+            if not self.matchPath(path):
+                continue
+            if self.checksSize and index is not None:
+                path = os.path.normpath(path)
+                dir = os.path.dirname(path)
+                if dir not in refreshed:
+                    index.refresh([dir])
+                    refreshed.add(dir)
+                if not self.matchSize(index.size(path)):
+                    continue
+            yield item
+
+
+# --------------------------------------------------------------------------
+# Filesystem index
+# --------------------------------------------------------------------------
+
+class IndexReport(object):
+
+    def __init__(self):
+        self.found = 0
+        self.missing = []
+        self.directories = {}   # dir -> [files, bytes]
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def __str__(self):
+        return 'Found {0} files ({1:.1f} MB) in {2} directories, {3} missing. Indexed in {4:.2f}s'.format(
+            self.found, self.bytes / (1024.0 * 1024.0), len(self.directories), len(self.missing), self.seconds)
+
+
+class FileIndex(object):
+    # In memory cache of file sizes per directory. Each directory is read with one os.scandir call
+    # instead of a stat per file, and re-read only when its mtime changes.
+    # Note that the mtime of a directory changes when files are added/removed/renamed, not when a file
+    # is overwritten in place. Call clear() to force a full re-read.
+
+    def __init__(self, workers=COPY_WORKERS):
+        self.workers = workers
+        self._dirs = {}     # dir -> (mtime, {name: size}) or None if the directory is missing
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._dirs.clear()
+
+    def _scan(self, dir):
+        try:
+            mtime = os.stat(dir).st_mtime
+        except OSError:
+            with self._lock:
+                self._dirs[dir] = None
+            return
+        with self._lock:
+            cached = self._dirs.get(dir)
+        if cached is not None and cached[0] == mtime:
+            return
+        files = {}
+        try:
+            for entry in os.scandir(dir):
+                try:
+                    if entry.is_file():
+                        files[entry.name] = entry.stat().st_size
+                except OSError:
+                    continue
+        except OSError:
+            files = None
+        with self._lock:
+            self._dirs[dir] = (mtime, files) if files is not None else None
+
+    def refresh(self, dirs):
+        dirs = list(dirs)
+        if len(dirs) == 1 or self.workers < 2:
+            for dir in dirs:
+                self._scan(dir)
+            return
+        # Directory reads on network shares are mostly latency, spread them over threads
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for _ in pool.map(self._scan, dirs):
+                pass
+
+    def size(self, path):
+        # Size of the file or None if it doesn't exist. Only looks at the cache
+        dir, name = os.path.split(path)
+        cached = self._dirs.get(dir)
+        if cached is None:
+            return None
+        return cached[1].get(name)
+
+    def check(self, paths):
+        # Indexes all parent directories of paths and returns an IndexReport
+        start = time.time()
+        report = IndexReport()
+        paths = [os.path.normpath(p) for p in paths]
+        self.refresh(dict.fromkeys(os.path.dirname(p) for p in paths))
+        for path in paths:
+            size = self.size(path)
+            if size is None:
+                report.missing.append(path)
+                continue
+            dir = os.path.dirname(path)
+            totals = report.directories.setdefault(dir, [0, 0])
+            totals[0] += 1
+            totals[1] += size
+            report.found += 1
+            report.bytes += size
+        report.seconds = time.time() - start
+        return report
+
+    def missingFrames(self, sequence):
+        # Frame numbers of a FileSequence that don't exist on disk
+        self.refresh(dict.fromkeys(os.path.dirname(os.path.normpath(p)) for p in sequence))
+        return [f for f in sequence.frames() if self.size(os.path.normpath(sequence.path(f))) is None]
+
+
+# Shared by all collections in this session
+fileIndex = FileIndex()
+
+
+# --------------------------------------------------------------------------
+# Manifest
+# --------------------------------------------------------------------------
+
+def HashFile(path):
+    # Fast content hash, read through mmap in chunks. xxhash when installed, BLAKE2 otherwise.
+    # The algorithm is part of the result so manifests from different machines still compare
+    if xxhash is not None:
+        h = xxhash.xxh3_128()
+        name = 'xxh3'
+    else:
+        h = hashlib.blake2b(digest_size=16)
+        name = 'blake2b'
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                for offset in range(0, size, HASH_CHUNK):
+                    h.update(m[offset:offset + HASH_CHUNK])
+    return name + ':' + h.hexdigest()
+
+
+class AssetManifest(object):
+    # Persistent list of collected assets as JSON Lines, one entry per file:
+    # path, size, mtime, frames (start, end of its sequence), nodes and hash.
+    # Hashes are reused as long as size and mtime are unchanged, so a resubmit only hashes new/changed files.
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.changed = []
+        self.missing = []
+        if os.path.isfile(path):
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.entries[entry['path']] = entry
+
+    def update(self, assets, workers=HASH_WORKERS):
+        # assets: AssetSet (or iterable of (path, parms, frames)). Stats every file, hashes the
+        # changed ones on a thread pool and returns the list of paths whose content changed.
+        # Files that can't be read (or are gone by the time they are hashed) end up in missing
+        start = time.time()
+        if hasattr(assets, 'entries'):
+            assets = assets.entries()
+        entries = {}
+        tohash = []
+        self.changed = []
+        self.missing = []
+        for path, parms, frames in assets:
+            try:
+                st = os.stat(path)
+            except OSError:
+                self.missing.append(path)
+                continue
+            entry = {
+                'path': path,
+                'size': st.st_size,
+                'mtime': st.st_mtime,
+                'frames': list(frames) if frames else None,
+                'nodes': sorted(set(p.rsplit('/', 1)[0] for p in parms)),
+                'hash': None,
+            }
+            old = self.entries.get(path)
+            if old is not None and old['size'] == st.st_size and old['mtime'] == st.st_mtime and old.get('hash'):
+                entry['hash'] = old['hash']
+            else:
+                tohash.append(path)
+            entries[path] = entry
+
+        for path, digest in zip(tohash, self._hashAll(tohash, workers)):
+            if digest is None:
+                self.missing.append(path)
+                del entries[path]
+                continue
+            old = self.entries.get(path)
+            entries[path]['hash'] = digest
+            if old is None or old.get('hash') != digest:
+                self.changed.append(path)
+
+        self.entries = entries
+        self.seconds = time.time() - start
+        return self.changed
+
+    @staticmethod
+    def _hashFile(path):
+        # None instead of raising, one unreadable file shouldn't stop the manifest (and the copy after it)
+        try:
+            return HashFile(path)
+        except OSError:
+            return None
+
+    def _hashAll(self, paths, workers):
+        if not paths:
+            return []
+        if workers > 1 and len(paths) > 1:
+            # Threads, not processes: this also runs inside Houdini, where a process pool would start
+            # Houdini binaries. Hashing releases the GIL on the big chunks, so threads scale the same
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(self._hashFile, paths))
+        return [self._hashFile(path) for path in paths]
+
+    def save(self, path=None):
+        # Written to a temp file and renamed, so an interrupted save never leaves half a manifest
+        path = path or self.path
+        dir = os.path.dirname(os.path.abspath(path))
+        if not os.path.isdir(dir):
+            os.makedirs(dir)
+        temp = path + '.tmp'
+        with open(temp, 'w') as f:
+            for entry in self.entries.values():
+                f.write(json.dumps(entry) + '\n')
+        os.replace(temp, path)
@@ -1,15 +1,137 @@
-# Batch import all STL files. Change folder location below and run
-
-import glob, os
-os.chdir("C:/MySTL-Directory/")
-
-obj = hou.node("..")
-
-if obj.node("file1") == None:
-    for filename in glob.glob("*.stl"):
-        file = obj.createNode("file")
-        file.setParms({"file": filename})
-else:
-    print "nothing to load here" 
-	
-	
+# Batch import all STL files in a folder as one packed primitive network
+#
+# Every STL is parsed once (in parallel, see stlUtils) and saved as .bgeo.sc next to it, or below a
+# cache folder. STLs older than their cache are not parsed again. All parts are then written to one
+# index file of packed disk primitives and loaded by a single file SOP, so thousands of parts stay
+# one node and load lazily.
+#
+# In Houdini: run and pick a folder. Outside: hython importSTL.py <folder> [-r] [--hip scene.hip]
+
+import argparse
+import os
+import sys
+import time
+
+import hou
+
+from stlUtils import CachePath, FindSTLFiles, IsCacheCurrent, ParseSTLFiles, PARSE_WORKERS
+
+INDEX_NAME = 'stl_import.bgeo.sc'
+
+
+def STLToGeometry(points, triangles):
+    # Bulk calls only, a hou.Point per corner would be far too slow on CAD parts
+    geo = hou.Geometry()
+    if len(points):
+        geo.createPoints([hou.Vector3()] * len(points))
+        geo.setPointFloatAttribValuesFromString('P', points.tobytes())
+        # STL winds counter-clockwise, Houdini front faces are clockwise
+        geo.createPolygons(triangles[:, ::-1].tolist())
+    return geo
+
+
+def ConvertSTLFiles(paths, directory, cacheDir=None, workers=PARSE_WORKERS):
+    # Returns ({stl: cache}, converted, failed). Caches newer than their STL are reused
+    caches = {path: CachePath(path, directory, cacheDir) for path in paths}
+    stale = [path for path in paths if not IsCacheCurrent(path, caches[path])]
+
+    failed = []
+    converted = 0
+    # In the UI sys.executable is Houdini itself, worker processes would launch Houdini
+    for path, points, triangles, error in ParseSTLFiles(stale, workers, processes=not hou.isUIAvailable()):
+        if error is not None:
+            print('Failed to read ' + path + ': ' + error)
+            failed.append(path)
+            del caches[path]
+            continue
+        # Writing geometry needs hou, so this part runs here
+        cache = caches[path]
+        if not os.path.exists(os.path.dirname(cache)):
+            os.makedirs(os.path.dirname(cache))
+        STLToGeometry(points, triangles).saveToFile(cache)
+        converted += 1
+    return caches, converted, failed
+
+
+def WritePackedIndex(caches, directory, indexFile):
+    # One packed disk primitive per part, named after the STL relative to the import folder
+    geo = hou.Geometry()
+    nameAttrib = geo.addAttrib(hou.attribType.Prim, 'name', '')
+    for path, cache in sorted(caches.items()):
+        prim = geo.createPacked('PackedDisk')
+        prim.setIntrinsicValue('unexpandedfilename', cache)
+        prim.setAttribValue(nameAttrib, os.path.splitext(os.path.relpath(path, directory))[0].replace('\\', '/'))
+    # Houdini picks the format from the whole suffix, so keep .bgeo.sc at the end: stl_import.tmp.bgeo.sc
+    folder, name = os.path.split(indexFile)
+    stem, dot, suffix = name.partition('.')
+    tmp = os.path.join(folder, stem + '.tmp' + dot + suffix)
+    geo.saveToFile(tmp)
+    os.replace(tmp, indexFile)
+
+
+def TargetNetwork():
+    # The network the script was run from, otherwise a geo node at /obj
+    net = hou.node('..')
+    if net is not None and net.childTypeCategory() == hou.sopNodeTypeCategory():
+        return net
+    obj = hou.node('/obj')
+    return obj.node('STL_import') or obj.createNode('geo', 'STL_import')
+
+
+def LoadIndex(net, indexFile):
+    # Reuses the file SOP of an earlier import, so running again just refreshes it
+    with hou.undos.group('Import STL'):
+        filesop = net.node('stl_parts')
+        if filesop is None:
+            filesop = net.createNode('file', 'stl_parts')
+            filesop.moveToGoodPosition()
+        filesop.parm('file').set(indexFile)
+        filesop.parm('reload').pressButton()
+        filesop.setDisplayFlag(True)
+    return filesop
+
+
+def ImportSTLDirectory(directory, recursive=False, cacheDir=None, workers=PARSE_WORKERS, net=None):
+    start = time.time()
+    paths = FindSTLFiles(directory, recursive)
+    if len(paths) < 1:
+        print('No STL files found in ' + directory)
+        return None
+
+    caches, converted, failed = ConvertSTLFiles(paths, directory, cacheDir, workers)
+    indexFile = os.path.join(cacheDir or directory, INDEX_NAME)
+    WritePackedIndex(caches, directory, indexFile)
+    filesop = LoadIndex(net or TargetNetwork(), indexFile)
+
+    print('{0} STL files: {1} converted, {2} cached, {3} failed ({4:.2f}s)'.format(
+        len(paths), converted, len(caches) - converted, len(failed), time.time() - start))
+    return filesop
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Batch import STL files as packed primitives. Run with hython.')
+    parser.add_argument('directory', help='folder with STL files')
+    parser.add_argument('-r', '--recursive', action='store_true', help='also import STL files in subfolders')
+    parser.add_argument('--cache', help='folder for the .bgeo.sc caches, default next to each STL')
+    parser.add_argument('--workers', type=int, default=PARSE_WORKERS, help='parallel parse processes')
+    parser.add_argument('--hip', help='hip file to add the import to, saved afterwards')
+    args = parser.parse_args(argv)
+
+    if args.hip and os.path.exists(args.hip):
+        hou.hipFile.load(args.hip, suppress_save_prompt=True, ignore_load_warnings=True)
+    directory = os.path.abspath(args.directory)
+    cacheDir = os.path.abspath(args.cache) if args.cache else None
+    filesop = ImportSTLDirectory(directory, args.recursive, cacheDir, args.workers)
+    if args.hip:
+        hou.hipFile.save(args.hip)
+    return 0 if filesop is not None else 1
+
+
+if hou.isUIAvailable():
+    directory = hou.ui.selectFile(title='Select Folder of STL files', file_type=hou.fileType.Directory)
+    if directory:
+        directory = hou.text.expandString(directory)
+        recursive = hou.ui.displayMessage('Include subfolders?', buttons=('Yes', 'No'), default_choice=1, close_choice=1) == 0
+        ImportSTLDirectory(directory, recursive)
+elif __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+######################################################
+##
+##  Material network helpers shared by GenerateMaterials and PRB_MaterialLister
+##  Trond Hille 2024
+##
+##  Unlike the other Utils modules these work on nodes and need hou.
+##
+#####################################################
+
+import math
+from enum import Enum
+
+import hou
+
+
+class ExtendedEnum(Enum):
+
+    @classmethod
+    def list(cls):
+        return list(map(lambda c: c.name, cls))
+
+
+class MatType(ExtendedEnum):
+    # Material types offered by GenerateMaterials and PRB_MaterialLister
+    Redshift = "redshift_vopnet"
+    KarmaMtlX = "karmamtlx_vopnet"
+
+
+def SetupKarmaMtlx(matvopnet, surfacename):
+    # Turns a subnet into a Karma MaterialX material: a standard surface wired to the surface
+    # output and an empty displacement output. Returns the standard surface node
+
+    # CLEANUP Default nodes
+    for child in matvopnet.children():
+        child.destroy()
+    mtlx = matvopnet.createNode('mtlxstandard_surface', surfacename)
+
+    surfaceoutput = matvopnet.createNode('subnetconnector', 'surface_output')
+    surfaceoutput.setParms({'connectorkind': 1, 'parmname': 'surface', 'parmlabel': 'Surface', 'parmtype': 24}) #Set to surface type
+    surfaceoutput.setInput(0, mtlx)
+
+    pos = mtlx.position()
+    pos += hou.Vector2((4,0))
+    surfaceoutput.setPosition(pos)
+    pos += hou.Vector2((0,-4))
+
+    displacementoutput = matvopnet.createNode('subnetconnector', 'displacement')
+    displacementoutput.setParms({'connectorkind': 1, 'parmname': 'displacement', 'parmlabel': 'Displacement', 'parmtype': 25}) #Set to displacement type
+    displacementoutput.setPosition(pos)
+
+    matvopnet.setMaterialFlag(1)
+    return mtlx
+
+
+def CreateKarmaMtlx(matnet, matname):
+    matvopnet = matnet.createNode('subnet', matname)
+    SetupKarmaMtlx(matvopnet, matname)
+    return matvopnet
+
+
+def LayoutGrid(nodes, spacing=(3, -1.5)):
+    # Places nodes in a single grid pass. Much cheaper than moveToGoodPosition per node
+    if len(nodes) < 1:
+        return
+    columns = int(math.ceil(math.sqrt(len(nodes))))
+
+    # Start below any nodes that are already in the network
+    placing = set(nodes)
+    others = [n for n in nodes[0].parent().children() if n not in placing]
+    start = hou.Vector2((0, 0))
+    if others:
+        start[1] = min(n.position()[1] for n in others) + spacing[1] * 2
+
+    for i, n in enumerate(nodes):
+        row, col = divmod(i, columns)
+        n.setPosition(start + hou.Vector2((col * spacing[0], row * spacing[1])))
@@ -0,0 +1,323 @@
+######################################################
+##
+##  Helpers for ProjectStarter
+##  Trond Hille 2024
+##
+##  Plain python without hou or Qt, so it can be tried out against temporary directories.
+##
+##  ProjectScaffold creates a new project folder from the FolderStructure.json template:
+##      "folders": ["/hip", "/hip/backup", "/geo", ...]
+##      "files": [["Z:/templates/start.hip", "/hip/start.hip"], ["$TEMPLATES/.env", "/.env"], ...]
+##  Only the leaf folders are created (makedirs makes the rest), spread over a thread pool since
+##  every call is a round trip to the file server. If anything fails the project folder is removed again.
+##
+##  ProjectRegistry keeps every project that was used or found on disk in SQLite, one row per project
+##  path, with the time it was last used. Replaces the ten entry lastprojects.json.
+##
+##  HdaLibraryCache remembers the HDA files found in each HOUDINI_OTLSCAN_PATH folder, so changing
+##  projects only installs and uninstalls the libraries that differ instead of reloading all of them.
+##
+#####################################################
+
+import bisect
+import json
+import os
+import re
+import shutil
+import sqlite3
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+
+SCAFFOLD_WORKERS = 8
+HDA_EXTENSIONS = ('.hda', '.hdanc', '.hdalc', '.otl', '.otlnc', '.otllc')
+
+
+def LeafFolders(folders):
+    # The minimal set of folders to create: anything that is the parent of another folder goes
+    normalized = set()
+    for folder in folders:
+        folder = folder.replace('\\', '/').strip('/')
+        if folder and folder != '.':
+            normalized.add(folder)
+    ordered = sorted(normalized)
+    leaves = []
+    for i, folder in enumerate(ordered):
+        # Sorted, so everything below folder is one run starting at folder + '/'. Not always right
+        # after folder itself: 'a-b' sorts between 'a' and 'a/c'
+        child = bisect.bisect_left(ordered, folder + '/', i + 1)
+        if child < len(ordered) and ordered[child].startswith(folder + '/'):
+            continue
+        leaves.append(folder)
+    return leaves
+
+
+class ScaffoldError(Exception):
+    pass
+
+
+class ProjectScaffold(object):
+    """Create a project folder with its folder structure and template files in one operation.
+
+    root must not exist yet. progress(done, total, path) is called from the worker threads.
+    """
+
+    def __init__(self, root, folders, files=(), workers=SCAFFOLD_WORKERS):
+        self.root = root
+        self.folders = LeafFolders(folders)
+        # (source, destination relative to root), sources may use environment variables
+        self.files = [(os.path.expandvars(src), dest.replace('\\', '/').strip('/')) for src, dest in files]
+        self.workers = workers
+
+    def total(self):
+        return len(self.folders) + len(self.files)
+
+    def _makeFolder(self, folder):
+        os.makedirs(os.path.join(self.root, folder), exist_ok=True)
+        return folder
+
+    def _copyFile(self, src, dest):
+        target = os.path.join(self.root, dest)
+        folder = os.path.dirname(target)
+        if not os.path.isdir(folder):
+            os.makedirs(folder, exist_ok=True)
+        shutil.copy2(src, target)
+        return dest
+
+    def _runAll(self, pool, jobs, done, progress):
+        # Runs one batch of jobs, stops at the first error
+        futures = [pool.submit(*job) for job in jobs]
+        pending = set(futures)
+        while pending:
+            finished, pending = wait(pending, return_when=FIRST_EXCEPTION)
+            for future in finished:
+                if future.exception() is not None:
+                    for other in pending:
+                        other.cancel()
+                    wait(pending)
+                    raise future.exception()
+                done += 1
+                if progress is not None:
+                    progress(done, self.total(), future.result())
+        return done
+
+    def run(self, progress=None):
+        """Create everything. Raises after rolling back if anything failed."""
+        missing = [src for src, dest in self.files if not os.path.isfile(src)]
+        if missing:
+            raise ScaffoldError('Template files not found:\n' + '\n'.join(missing))
+        # Fails if the project already exists, nothing of someone else's gets rolled back
+        os.makedirs(self.root)
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                done = self._runAll(pool, [(self._makeFolder, folder) for folder in self.folders], 0, progress)
+                # Folders first, so file copies don't race makedirs for the same folder
+                self._runAll(pool, [(self._copyFile, src, dest) for src, dest in self.files], done, progress)
+        except BaseException:
+            self.rollback()
+            raise
+
+    def rollback(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+class ProjectRegistry(object):
+    """Projects by path, stored in SQLite.
+
+    Every save is a single upsert in its own transaction, so a crash never leaves a half written
+    registry and two Houdini sessions can share the file. Projects are looked up by path through the
+    primary key. search() does fuzzy matching over the names kept in memory, reloaded only when the
+    database changed (also from another connection, see PRAGMA data_version).
+    """
+
+    def __init__(self, path):
+        folder = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        self.path = path
+        self.db = sqlite3.connect(path, timeout=10)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS projects (
+                key TEXT PRIMARY KEY, path TEXT, name TEXT, data TEXT, last_used REAL);
+            CREATE INDEX IF NOT EXISTS projects_last_used ON projects (last_used);
+        """)
+        self._version = None
+        self._names = []        # lower case names, most recently used first
+        self._rows = []         # (name, data) in the same order
+        self._blob = ''
+        self._starts = []
+
+    def close(self):
+        self.db.close()
+
+    @staticmethod
+    def key(path):
+        # Same folder, same project: slashes, trailing separators and (on Windows) case don't matter
+        return os.path.normcase(os.path.normpath(path)).replace('\\', '/')
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM projects").fetchone()[0]
+
+    def touch(self, path, name, data, lastUsed=None):
+        """Add or update a project and mark it as used now."""
+        with self.db:
+            self.db.execute("""
+                INSERT INTO projects VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET path = excluded.path, name = excluded.name,
+                    data = excluded.data, last_used = excluded.last_used""",
+                (self.key(path), path, name, json.dumps(data), time.time() if lastUsed is None else lastUsed))
+
+    def add(self, projects):
+        """Add (path, name, data) projects found on disk. Known projects keep their data and last used time."""
+        with self.db:
+            self.db.executemany("INSERT OR IGNORE INTO projects VALUES (?, ?, ?, ?, 0)",
+                                ((self.key(path), path, name, json.dumps(data)) for path, name, data in projects))
+
+    def get(self, path):
+        row = self.db.execute("SELECT name, data FROM projects WHERE key = ?", (self.key(path),)).fetchone()
+        return None if row is None else (row[0], json.loads(row[1]))
+
+    def recent(self, limit=10):
+        rows = self.db.execute("SELECT name, data FROM projects ORDER BY last_used DESC, name LIMIT ?", (limit,))
+        return [(name, json.loads(data)) for name, data in rows]
+
+    def _load(self):
+        version = self.db.execute("PRAGMA data_version").fetchone()[0], self.db.total_changes
+        if version == self._version:
+            return
+        self._version = version
+        rows = self.db.execute("SELECT name, data FROM projects ORDER BY last_used DESC, name").fetchall()
+        self._rows = [(name, data) for name, data in rows]
+        self._names = [name.lower().replace('\n', ' ') for name, data in rows]
+        # All names in one string, so a query is a single regex pass in C instead of a loop per project
+        self._blob = '\n'.join(self._names)
+        self._starts = []
+        offset = 0
+        for name in self._names:
+            self._starts.append(offset)
+            offset += len(name) + 1
+
+    def search(self, query, limit=50):
+        """Projects whose name contains query, then ones that contain its letters in order.
+
+        Each group is sorted by last use. An empty query gives the most recently used projects.
+        """
+        query = query.strip().lower()
+        if not query:
+            return self.recent(limit)
+        self._load()
+        contiguous = re.escape(query)
+        fuzzy = '[^\n]*?'.join(re.escape(c) for c in query if not c.isspace())
+        found = []
+        seen = set()
+        for pattern in (contiguous, fuzzy):
+            for match in re.finditer(pattern, self._blob):
+                index = bisect.bisect_right(self._starts, match.start()) - 1
+                if index not in seen:
+                    seen.add(index)
+                    found.append(index)
+            if len(found) >= limit:
+                break
+        return [(self._rows[i][0], json.loads(self._rows[i][1])) for i in found[:limit]]
+
+    def importJson(self, file):
+        """One time import of the old lastprojects.json, a list of [name, data] pairs with the newest first."""
+        try:
+            with open(file, 'r') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        now = time.time()
+        for i, (name, data) in enumerate(reversed(entries)):
+            path = data.get('prjPath', '') + '/' + name
+            self.touch(path, name, data, now - len(entries) + i)
+        return len(entries)
+
+
+def FindProjects(root, pattern, depth=2):
+    """Walk root down to depth levels and return (path, name, data) for folders matching pattern.
+
+    pattern is the ProjectStarter _prjRegEx with prjid and prjname groups. Matching folders are not
+    searched further, projects don't contain other projects.
+    """
+    regex = re.compile(pattern)
+    found = []
+    level = [root]
+    for i in range(depth):
+        below = []
+        for folder in level:
+            try:
+                entries = list(os.scandir(folder))
+            except OSError:
+                continue
+            for entry in entries:
+                if not entry.is_dir():
+                    continue
+                match = regex.match(entry.name)
+                if match:
+                    parent = folder.replace('\\', '/')
+                    data = {'prjId': match.group('prjid'), 'prjName': match.group('prjname'), 'prjPath': parent}
+                    found.append((parent + '/' + entry.name, entry.name, data))
+                elif not entry.name.startswith('.'):
+                    below.append(entry.path)
+        level = below
+    return found
+
+
+def ScanPathFolders(scanPath, expand=os.path.expandvars):
+    # HOUDINI_OTLSCAN_PATH entries in order, without & (Houdini's default path) and duplicates
+    folders = []
+    for entry in (scanPath or '').split(';'):
+        entry = entry.strip()
+        if not entry or entry == '&':
+            continue
+        folder = os.path.normpath(expand(entry)).replace('\\', '/')
+        if folder not in folders:
+            folders.append(folder)
+    return folders
+
+
+class HdaLibraryCache(object):
+    """HDA library files per scan folder, with their mtimes.
+
+    A folder is only listed again when its own mtime changed, the files in it are just stat'ed.
+    installed holds {file: mtime} of the libraries loaded from the scan path, None until known.
+    """
+
+    def __init__(self):
+        self._folders = {}
+        self.installed = None
+
+    def _names(self, folder):
+        try:
+            mtime = os.stat(folder).st_mtime
+        except OSError:
+            self._folders.pop(folder, None)
+            return []
+        cached = self._folders.get(folder)
+        if cached is None or cached[0] != mtime:
+            # Expanded (folder) HDAs count too
+            with os.scandir(folder) as entries:
+                names = sorted(entry.name for entry in entries if entry.name.lower().endswith(HDA_EXTENSIONS))
+            cached = (mtime, names)
+            self._folders[folder] = cached
+        return cached[1]
+
+    def files(self, folders):
+        """{file: mtime} of every library in folders. A file in several folders counts once."""
+        found = {}
+        for folder in folders:
+            for name in self._names(folder):
+                path = folder + '/' + name
+                try:
+                    found.setdefault(path, os.stat(path).st_mtime)
+                except OSError:
+                    pass
+        return found
+
+
+def DiffLibraries(installed, found):
+    """(added, removed, changed) library files between two {file: mtime} dicts."""
+    added = sorted(path for path in found if path not in installed)
+    removed = sorted(path for path in installed if path not in found)
+    changed = sorted(path for path, mtime in found.items() if path in installed and installed[path] != mtime)
+    return added, removed, changed
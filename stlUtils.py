@@ -0,0 +1,131 @@
+######################################################
+##
+##  Helpers for importSTL
+##  Trond Hille 2024
+##
+##  Plain python and numpy without hou, so the STL parsing can run in worker processes.
+##  Binary STL is read straight from a memory map with numpy.frombuffer, ASCII STL with one
+##  regex pass over the mapped file. Duplicate corners are merged so every part comes out as
+##  shared points and triangles.
+##
+#####################################################
+
+import mmap
+import os
+import re
+import struct
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+STL_HEADER = 80
+# One binary STL triangle: normal, three corners and the attribute byte count, 50 bytes packed
+STL_TRIANGLE = np.dtype([('normal', '<f4', (3,)), ('corners', '<f4', (3, 3)), ('attr', '<u2')])
+STL_VERTEX = re.compile(rb'vertex\s+(\S+)\s+(\S+)\s+(\S+)')
+CACHE_EXT = '.bgeo.sc'
+PARSE_WORKERS = os.cpu_count() or 4
+
+
+def IsBinarySTL(data):
+    # ASCII files start with 'solid', but so do plenty of binary exports. The size check is reliable
+    if len(data) < STL_HEADER + 4:
+        return False
+    count = struct.unpack_from('<I', data, STL_HEADER)[0]
+    return len(data) == STL_HEADER + 4 + count * STL_TRIANGLE.itemsize
+
+
+def ReadSTL(path):
+    """Read a binary or ASCII STL file. Returns (points, triangles).
+
+    points is a float32 (n, 3) array of unique positions, triangles an int32 (m, 3) array of point numbers,
+    in the counter-clockwise STL winding. Raises ValueError for files that are not STL.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError('empty file')
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if IsBinarySTL(data):
+                count = struct.unpack_from('<I', data, STL_HEADER)[0]
+                records = np.frombuffer(data, dtype=STL_TRIANGLE, count=count, offset=STL_HEADER + 4)
+                # Copy out of the map, it can't be closed while numpy still points into it
+                corners = records['corners'].reshape(-1, 3).copy()
+                del records
+            elif data[:1024].lstrip().lower().startswith(b'solid'):
+                corners = np.array(STL_VERTEX.findall(data), dtype=np.float32).reshape(-1, 3)
+                if len(corners) % 3:
+                    raise ValueError('truncated ASCII STL, {0} vertices'.format(len(corners)))
+            else:
+                raise ValueError('not an STL file')
+
+    # Unique on the raw 12 byte rows, several times faster than np.unique(axis=0)
+    rows = np.ascontiguousarray(corners).view(np.dtype((np.void, corners.itemsize * 3))).ravel()
+    unique, first, inverse = np.unique(rows, return_index=True, return_inverse=True)
+    return corners[first], inverse.reshape(-1, 3).astype(np.int32)
+
+
+def ParseSTL(path):
+    # Worker entry point. Errors are returned rather than raised so one broken part doesn't stop the batch
+    try:
+        points, triangles = ReadSTL(path)
+        return path, points, triangles, None
+    except (OSError, ValueError) as e:
+        return path, None, None, str(e)
+
+
+def ParseSTLFiles(paths, workers=PARSE_WORKERS, processes=True):
+    """Parse STL files in parallel, yields ParseSTL results as they finish.
+
+    Uses a process pool, or threads when processes is False. Pass False inside a Houdini session:
+    sys.executable is Houdini there, so spawned workers would start Houdini instead of python.
+    """
+    paths = list(paths)
+    if workers < 2 or len(paths) < 2:
+        for path in paths:
+            yield ParseSTL(path)
+        return
+    if processes:
+        done = set()
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for future in as_completed([pool.submit(ParseSTL, path) for path in paths]):
+                    result = future.result()
+                    done.add(result[0])
+                    yield result
+            return
+        except (OSError, RuntimeError, ImportError):
+            # No usable subprocesses, or the pool broke partway. Only what is left goes to the threads
+            paths = [path for path in paths if path not in done]
+    # numpy releases the GIL for the heavy parts so threads still help
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in as_completed([pool.submit(ParseSTL, path) for path in paths]):
+            yield future.result()
+
+
+def FindSTLFiles(directory, recursive=False):
+    """All .stl files in directory (any case), sorted."""
+    found = []
+    folders = [directory]
+    while folders:
+        with os.scandir(folders.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    if recursive:
+                        folders.append(entry.path)
+                elif entry.name.lower().endswith('.stl'):
+                    found.append(entry.path)
+    return sorted(found)
+
+
+def CachePath(path, directory, cacheDir=None):
+    # Caches mirror the source tree below cacheDir, or sit next to the STL
+    stem = os.path.splitext(path)[0]
+    if cacheDir is None:
+        return stem + CACHE_EXT
+    return os.path.join(cacheDir, os.path.relpath(stem, directory) + CACHE_EXT)
+
+
+def IsCacheCurrent(path, cache):
+    try:
+        return os.path.getmtime(cache) >= os.path.getmtime(path)
+    except OSError:
+        return False
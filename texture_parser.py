@@ -0,0 +1,240 @@
+######################################################
+##
+##  Texture file name parser used by PRB_MaterialLister
+##  Trond Hille 2024
+##
+##  One precompiled pattern that splits a texture file name into name, map type, colour space,
+##  UDIM and extension. Covers the common Substance, Mari and Quixel naming conventions, see
+##  NAMING_CORPUS. Run this file directly for a quick parse check and micro benchmark.
+##
+#####################################################
+
+import re
+import time
+from collections import namedtuple
+
+# Map types as they show up in file names -> the name used for texture sets
+MAP_TYPES = {
+    'basecolor': 'BaseColor',
+    'base_color': 'BaseColor',
+    'albedo': 'BaseColor',
+    'diffuse': 'BaseColor',
+    'color': 'BaseColor',
+    'emissive': 'Emissive',
+    'emission': 'Emissive',
+    'height': 'Height',
+    'displacement': 'Height',
+    'bump': 'Bump',
+    'normal': 'Normal',
+    'metallic': 'Metallic',
+    'metalness': 'Metallic',
+    'roughness': 'Roughness',
+    'glossiness': 'Glossiness',
+    'gloss': 'Gloss',
+    'specular': 'Specular',
+    'opacity': 'Opacity',
+    'transmission': 'Transmission',
+    'translucency': 'Transmission',
+    'ao': 'AO',
+    'ambientocclusion': 'AO',
+    'mixed_ao': 'AO',
+    'cavity': 'Cavity',
+}
+
+COLOR_SPACES = ('ACES - ACEScg', 'ACEScg', 'raw', 'srgb', 'rgb', 'linear', 'lin')
+EXTENSIONS = ('exr', 'png', 'tiff', 'tif', 'jpg', 'jpeg', 'tx', 'rat', 'tga')
+
+
+def _alternatives(words):
+    # Longest first so Glossiness wins over Gloss
+    return '|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+
+# name: everything before the map type (optional, Mari often only writes the channel)
+# res: Quixel resolution token (2K, 4K, 8K)
+# variant: normal map flavour or LOD (Normal_OpenGL, Normal_LOD0)
+# udim: 1001-1999, there is no tile 1000
+TEXTURE_PATTERN = re.compile(
+    r"^(?:(?P<name>.+?)(?:[_ ](?P<res>\d+K))?[_. -])?"
+    r"(?P<type>" + _alternatives(MAP_TYPES) + r")"
+    r"(?P<variant>(?:_(?:OpenGL|DirectX|LOD\d+))*)"
+    r"(?:(?P<spacer>[_ .])(?P<colorspace>" + _alternatives(COLOR_SPACES) + r"))?"
+    r"(?:[._](?P<udim>1(?:00[1-9]|0[1-9]\d|[1-9]\d\d)))?"
+    r"\.(?P<ext>" + _alternatives(EXTENSIONS) + r")$",
+    re.IGNORECASE)
+
+TextureName = namedtuple('TextureName', 'file_name name map_type color_space udim ext normalized')
+
+
+def longest_common_prefix(strings):
+    """Find the longest common prefix string amongst an array of strings.
+
+    The prefix of all strings is the prefix of the smallest and largest one, so this is linear.
+    """
+    if not strings:
+        return ""
+    first = min(strings)
+    last = max(strings)
+    i = 0
+    length = min(len(first), len(last))
+    while i < length and first[i] == last[i]:
+        i += 1
+    return first[:i]
+
+
+def parse_texture_name(file_name):
+    """Parse one texture file name. Returns a TextureName or None if it isn't a texture."""
+    match = TEXTURE_PATTERN.match(file_name)
+    if match is None:
+        return None
+    udim = match.group('udim')
+    if udim:
+        start, end = match.span('udim')
+        normalized = file_name[:start] + '<UDIM>' + file_name[end:]
+        udim = int(udim)
+    else:
+        normalized = file_name
+        udim = None
+    map_type = MAP_TYPES[match.group('type').lower()]
+    return TextureName(file_name, match.group('name') or '', map_type, match.group('colorspace'),
+                       udim, '.' + match.group('ext'), normalized)
+
+
+def set_names(names):
+    """Strip the prefix shared by all names (cut back to a _ boundary), the rest is the set name."""
+    prefix = longest_common_prefix(names)
+    if len(set(names)) > 1:
+        cut = prefix.rfind('_') + 1
+        prefix = prefix[:cut]
+    else:
+        prefix = ''
+    return prefix, {name: (name[len(prefix):] or name) for name in names}
+
+
+def parse_texture_names(filenames):
+    """Parse the texture files in one folder.
+
+    Returns (common prefix, matches) with one (file name, texture name, texture type, colour space,
+    udim, extension, normalized name) tuple per texture file.
+    """
+    parsed = [t for t in map(parse_texture_name, filenames) if t is not None]
+    prefix, sets = set_names([t.name for t in parsed])
+    matches = [(t.file_name, sets[t.name], t.map_type, t.color_space, t.udim, t.ext, t.normalized) for t in parsed]
+    return prefix, matches
+
+
+class UdimSet:
+    """Compact set of UDIM tiles plus their total file size.
+
+    Tiles are bits in one int (bit 0 = 1001), so a full 10x10 UDIM layout fits in a couple of
+    machine words. Textures without UDIMs only add to the size.
+    """
+
+    __slots__ = ('bits', 'bytes')
+    FIRST = 1001
+
+    def __init__(self, tiles=(), bits=0, bytes=0):
+        self.bits = bits
+        self.bytes = bytes
+        for tile in tiles:
+            self.add(tile)
+
+    def add(self, udim, size=0):
+        # Tiles below 1001 don't exist, their size still counts
+        if udim is not None and udim >= self.FIRST:
+            self.bits |= 1 << (udim - self.FIRST)
+        self.bytes += size
+
+    def __contains__(self, udim):
+        return udim >= self.FIRST and bool(self.bits >> (udim - self.FIRST) & 1)
+
+    def __iter__(self):
+        bits = self.bits
+        tile = self.FIRST
+        while bits:
+            if bits & 1:
+                yield tile
+            bits >>= 1
+            tile += 1
+
+    def __len__(self):
+        return bin(self.bits).count('1')
+
+    def __or__(self, other):
+        return UdimSet(bits=self.bits | other.bits, bytes=self.bytes + other.bytes)
+
+    def __eq__(self, other):
+        return isinstance(other, UdimSet) and self.bits == other.bits
+
+    def missing(self, other):
+        """Tiles in other that are not in this set."""
+        return list(UdimSet(bits=other.bits & ~self.bits))
+
+    def __repr__(self):
+        return f"UdimSet({list(self)}, bytes={self.bytes})"
+
+
+def missing_tiles(maps):
+    """maps: {map type: UdimSet}. Returns {map type: [tiles other maps of the set have but this one lacks]}."""
+    union = 0
+    for udims in maps.values():
+        union |= udims.bits
+    everything = UdimSet(bits=union)
+    result = {}
+    for map_type, udims in maps.items():
+        missing = udims.missing(everything)
+        if missing:
+            result[map_type] = missing
+    return result
+
+
+# Real world naming conventions. file name -> (name, map type, colour space, udim, ext)
+NAMING_CORPUS = {
+    # Substance Painter
+    'crate_wood_BaseColor.png': ('crate_wood', 'BaseColor', None, None, '.png'),
+    'crate_wood_Normal_OpenGL.png': ('crate_wood', 'Normal', None, None, '.png'),
+    'crate_metal_Mixed_AO.png': ('crate_metal', 'AO', None, None, '.png'),
+    'hero_body_Roughness.1001.exr': ('hero_body', 'Roughness', None, 1001, '.exr'),
+    'hero_body_BaseColor_ACES - ACEScg.1002.exr': ('hero_body', 'BaseColor', 'ACES - ACEScg', 1002, '.exr'),
+    'hero_underside_Height_raw.1011.exr': ('hero_underside', 'Height', 'raw', 1011, '.exr'),
+    'Ship_Hull_Metallic.tif': ('Ship_Hull', 'Metallic', None, None, '.tif'),
+    # Mari
+    'diffuse.1001.tif': ('', 'BaseColor', None, 1001, '.tif'),
+    'robot_Diffuse.1004.tif': ('robot', 'BaseColor', None, 1004, '.tif'),
+    'robot_Specular_srgb.1001.exr': ('robot', 'Specular', 'srgb', 1001, '.exr'),
+    'robot_Displacement.1001.exr': ('robot', 'Height', None, 1001, '.exr'),
+    'robot_Diffuse.1010.tif': ('robot', 'BaseColor', None, 1010, '.tif'),
+    'robot_Diffuse.1999.tif': ('robot', 'BaseColor', None, 1999, '.tif'),
+    # Quixel Megascans
+    'ulrlbdqa_2K_Albedo.jpg': ('ulrlbdqa', 'BaseColor', None, None, '.jpg'),
+    'ulrlbdqa_2K_Roughness.jpg': ('ulrlbdqa', 'Roughness', None, None, '.jpg'),
+    'ulrlbdqa_2K_Normal_LOD0.jpg': ('ulrlbdqa', 'Normal', None, None, '.jpg'),
+    'ulrlbdqa_4K_Displacement.exr': ('ulrlbdqa', 'Height', None, None, '.exr'),
+    'vgvmcgf_8K_Translucency.jpg': ('vgvmcgf', 'Transmission', None, None, '.jpg'),
+    # Not textures
+    'readme.txt': None,
+    'preview.jpg': None,
+    'crate.fbx': None,
+    'robot_Diffuse.1000.tif': None,
+}
+
+
+if __name__ == '__main__':
+    failed = 0
+    for file_name, expected in NAMING_CORPUS.items():
+        t = parse_texture_name(file_name)
+        got = None if t is None else (t.name, t.map_type, t.color_space, t.udim, t.ext)
+        if got != expected:
+            failed += 1
+            print(f"MISMATCH {file_name}: {got} != {expected}")
+    print(f"{len(NAMING_CORPUS) - failed}/{len(NAMING_CORPUS)} corpus names parsed as expected")
+
+    # Micro benchmark: 100k UDIM tiles
+    names = [f"asset_set{i % 300}_{t}_ACES - ACEScg.{1001 + i % 100}.exr"
+             for i, t in enumerate(['BaseColor', 'Roughness', 'Normal', 'Height'] * 25000)]
+    start = time.time()
+    longest_common_prefix(names)
+    print(f"longest_common_prefix: {len(names)} names in {time.time() - start:.3f}s")
+    start = time.time()
+    parse_texture_names(names)
+    print(f"parse_texture_names: {len(names)} names in {time.time() - start:.3f}s")